@@ -1,9 +1,10 @@
 from typing import Generator
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
+from jose import JWTError
 from sqlalchemy.orm import Session
 from ..core.config import settings
+from ..core.security import decode_token
 from ..services.auth import AuthService
 from ..models.domain import User
 from sqlalchemy import create_engine
@@ -36,13 +37,13 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=["HS256"]
-        )
+        payload = decode_token(token)
+        if payload.get("type") == "refresh":
+            raise credentials_exception
         user_id: int = int(payload.get("sub"))
         if user_id is None:
             raise credentials_exception
-    except JWTError:
+    except (JWTError, TypeError, ValueError):
         raise credentials_exception
 
     user = AuthService(db).get_user_by_id(user_id)
@@ -7,6 +7,7 @@ from ..services.auth import AuthService
 from ..models.schemas import UserCreate, UserResponse, Token, Login
 from .dependencies import get_db, get_auth_service, get_current_user
 from ..models.domain import User
+from ..core.keys import key_ring
 
 router = APIRouter()
 
@@ -17,7 +18,7 @@ def register(
 ) -> Any:
     """Register a new user"""
     user = auth_service.create_user(user_data)
-    return auth_service.create_tokens(user.id)
+    return auth_service.create_tokens(user.id, user.email)
 
 @router.post("/token", response_model=Token)
 def login(
@@ -32,7 +33,7 @@ def login(
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return auth_service.create_tokens(user.id)
+    return auth_service.create_tokens(user.id, user.email)
 
 @router.post("/login", response_model=Token)
 def login_json(
@@ -46,7 +47,7 @@ def login_json(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
         )
-    return auth_service.create_tokens(user.id)
+    return auth_service.create_tokens(user.id, user.email)
 
 @router.get("/users/me", response_model=UserResponse)
 def read_users_me(
@@ -55,6 +56,11 @@ def read_users_me(
     """Get current user"""
     return current_user
 
+@router.get("/.well-known/jwks.json")
+def jwks() -> Any:
+    """Public keys that verify access tokens"""
+    return key_ring.jwks()
+
 @router.post("/verify")
 def verify_token(
     current_user: User = Depends(get_current_user)
@@ -10,6 +10,15 @@ class Settings(BaseSettings):
     SECRET_KEY: str = secrets.token_urlsafe(32)
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+
+    # Token signing: RS256 with keys published at /.well-known/jwks.json so
+    # other services verify tokens locally; "HS256" keeps the shared SECRET_KEY.
+    # To rotate, sign with a new JWT_PRIVATE_KEY_FILE and keep the old public
+    # key in JWT_PUBLIC_KEY_FILES (comma-separated PEMs) until its tokens expire
+    JWT_ALGORITHM: str = "RS256"
+    JWT_PRIVATE_KEY_FILE: str = ""
+    JWT_PUBLIC_KEY_FILES: str = ""
+    JWT_ACCEPT_HS256: bool = True  # accept tokens issued before the switch to RS256
     
     # Database
     MYSQL_HOST: str = "localhost"
@@ -0,0 +1,76 @@
+import base64
+import hashlib
+import json
+import logging
+from typing import Dict, List, Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+class KeyRing:
+    """
+    RSA keys for signing tokens. The current key signs; it and any retired
+    keys still listed in JWT_PUBLIC_KEY_FILES are published as a JWKS, so
+    tokens issued before a rotation keep verifying until they expire.
+    Each key is identified by its RFC 7638 thumbprint ("kid").
+    """
+
+    def __init__(self):
+        self.signing_key: Optional[str] = None
+        self.kid: Optional[str] = None
+        self.public_keys: Dict[str, Dict] = {}
+
+    def load(self) -> None:
+        if settings.JWT_PRIVATE_KEY_FILE:
+            with open(settings.JWT_PRIVATE_KEY_FILE) as key_file:
+                private_pem = key_file.read()
+        else:
+            # Fine for a single instance; every process would otherwise sign with its own key
+            logger.warning("JWT_PRIVATE_KEY_FILE not set, generating a temporary signing key")
+            private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+            private_pem = private_key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption()
+            ).decode()
+
+        self.signing_key = private_pem
+        self.kid = self._add_public_key(jwk.construct(private_pem, "RS256").public_key())
+
+        for path in filter(None, (p.strip() for p in settings.JWT_PUBLIC_KEY_FILES.split(","))):
+            with open(path) as key_file:
+                self._add_public_key(jwk.construct(key_file.read(), "RS256"))
+
+    def _add_public_key(self, key) -> str:
+        public = key.to_dict()
+        kid = _thumbprint(public)
+        self.public_keys[kid] = {**public, "kid": kid, "use": "sig", "alg": "RS256"}
+        return kid
+
+    def ensure_loaded(self) -> None:
+        if self.signing_key is None:
+            self.load()
+
+    def jwks(self) -> Dict[str, List[Dict]]:
+        self.ensure_loaded()
+        return {"keys": list(self.public_keys.values())}
+
+    def public_key(self, kid: Optional[str]) -> Optional[Dict]:
+        self.ensure_loaded()
+        return self.public_keys.get(kid) if kid else None
+
+def _thumbprint(public: Dict) -> str:
+    members = json.dumps(
+        {"e": public["e"], "kty": public["kty"], "n": public["n"]},
+        separators=(",", ":"),
+        sort_keys=True
+    )
+    digest = hashlib.sha256(members.encode()).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+key_ring = KeyRing()
@@ -1,12 +1,25 @@
 from datetime import datetime, timedelta
-from typing import Any, Union, Optional
-from jose import jwt
+from typing import Any, Dict, Union, Optional
+from jose import jwt, JWTError
 from passlib.context import CryptContext
 from .config import settings
+from .keys import key_ring
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-def create_access_token(subject: Union[str, Any], expires_delta: Optional[timedelta] = None) -> str:
+def _encode(claims: Dict[str, Any]) -> str:
+    if settings.JWT_ALGORITHM == "HS256":
+        return jwt.encode(claims, settings.SECRET_KEY, algorithm="HS256")
+    key_ring.ensure_loaded()
+    return jwt.encode(
+        claims, key_ring.signing_key, algorithm="RS256", headers={"kid": key_ring.kid}
+    )
+
+def create_access_token(
+    subject: Union[str, Any],
+    expires_delta: Optional[timedelta] = None,
+    email: Optional[str] = None
+) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
@@ -15,17 +28,32 @@ def create_access_token(subject: Union[str, Any], expires_delta: Optional[timede
         )
     
     to_encode = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
-    return encoded_jwt
+    if email:
+        # Lets services that verify tokens locally identify the user without a lookup
+        to_encode["email"] = email
+    return _encode(to_encode)
 
 def create_refresh_token(subject: Union[str, Any]) -> str:
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode = {"exp": expire, "sub": str(subject), "type": "refresh"}
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
-    return encoded_jwt
+    return _encode(to_encode)
+
+def decode_token(token: str) -> Dict[str, Any]:
+    """Verify a token's signature and expiry; raises JWTError"""
+    header = jwt.get_unverified_header(token)
+    if header.get("alg") == "HS256":
+        # Tokens issued before the switch to RS256 stay valid until they expire
+        if settings.JWT_ALGORITHM != "HS256" and not settings.JWT_ACCEPT_HS256:
+            raise JWTError("HS256 tokens are no longer accepted")
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+
+    key = key_ring.public_key(header.get("kid"))
+    if key is None:
+        raise JWTError("Unknown signing key")
+    return jwt.decode(token, key, algorithms=["RS256"])
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
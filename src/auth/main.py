@@ -4,10 +4,15 @@ from .api.routes import router
 from .core.config import settings
 from .models.domain import Base
 from .api.dependencies import engine
+from .core.keys import key_ring
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+# Load (or generate) the token signing keys up front rather than on first login
+if settings.JWT_ALGORITHM != "HS256":
+    key_ring.load()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json"
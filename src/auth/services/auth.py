@@ -34,8 +34,8 @@ class AuthService:
             return None
         return user
 
-    def create_tokens(self, user_id: int) -> Token:
-        access_token = create_access_token(user_id)
+    def create_tokens(self, user_id: int, email: Optional[str] = None) -> Token:
+        access_token = create_access_token(user_id, email=email)
         refresh_token = create_refresh_token(user_id)
         return Token(
             access_token=access_token,
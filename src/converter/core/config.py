@@ -1,6 +1,16 @@
 from pydantic_settings import BaseSettings
+from typing import Any, Dict, List
 import os
 
+def parse_lanes(value: str) -> Dict[str, int]:
+    """Parse "short=2,long=1" into {"short": 2, "long": 1}"""
+    lanes = {}
+    for item in value.split(","):
+        name, _, limit = item.partition("=")
+        if name.strip():
+            lanes[name.strip()] = max(1, int(limit or 1))
+    return lanes
+
 class Settings(BaseSettings):
     # Service name
     SERVICE_NAME: str = "MP3 Converter Service"
@@ -18,16 +28,122 @@ class Settings(BaseSettings):
     # File Storage Settings
     UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "/tmp/uploads")
     OUTPUT_DIR: str = os.getenv("OUTPUT_DIR", "/tmp/converted")
+    # "local" uses the directories above; "http" an S3-style object store at STORAGE_URL
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "local")
+    STORAGE_URL: str = os.getenv("STORAGE_URL", "http://localhost:9000/media")
+    STORAGE_TOKEN: str = os.getenv("STORAGE_TOKEN", "")
+    STORAGE_PART_SIZE: int = 8 * 1024 * 1024  # bytes per multipart upload part
+    STORAGE_TIMEOUT: int = 60  # seconds
+    # Encodes and fetched inputs are written here (ideally a tmpfs) and only
+    # published to the store once complete
+    SCRATCH_DIR: str = os.getenv("SCRATCH_DIR", "/tmp/converter-scratch")
+    SCRATCH_STALE_AGE: int = 600  # seconds unmodified before leftovers are removed at startup
+    
+    RELAY_TIMEOUT: int = 120  # seconds without data from a gateway upload relay
+    
+    # Conversion Cache Settings
+    CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    CACHE_COLLECTION: str = "conversion_cache"
+    CACHE_TTL: int = 7 * 24 * 3600  # seconds an unused entry is kept
+    CACHE_MAX_ENTRIES: int = 10000
+    
+    # Output Profiles: a job asks for one or more of these by name and all
+    # of them are produced from a single decode. "bitrate" selects CBR/ABR,
+    # "quality" selects VBR (lower is better).
+    OUTPUT_PROFILES: Dict[str, Dict[str, Any]] = {
+        "mp3_128": {"codec": "libmp3lame", "bitrate": "128k", "sample_rate": 44100, "extension": ".mp3"},
+        "mp3_192": {"codec": "libmp3lame", "bitrate": "192k", "sample_rate": 44100, "extension": ".mp3"},
+        "mp3_320": {"codec": "libmp3lame", "bitrate": "320k", "sample_rate": 44100, "extension": ".mp3"},
+        "mp3_v0": {"codec": "libmp3lame", "quality": 0, "sample_rate": 44100, "extension": ".mp3"},
+        "mp3_v2": {"codec": "libmp3lame", "quality": 2, "sample_rate": 44100, "extension": ".mp3"},
+        "opus_96": {"codec": "libopus", "bitrate": "96k", "sample_rate": 48000, "extension": ".opus"},
+        "aac_192": {"codec": "aac", "bitrate": "192k", "sample_rate": 44100, "extension": ".m4a"},
+    }
+    DEFAULT_PROFILE: str = os.getenv("DEFAULT_PROFILE", "mp3_192")
+    # Lower bitrate and sample rate to the source's instead of always using the profile's
+    ADAPTIVE_BITRATE: bool = os.getenv("ADAPTIVE_BITRATE", "true").lower() == "true"
+    
+    # Write the primary output so the gateway can stream it while encoding
+    PROGRESSIVE_OUTPUT: bool = os.getenv("PROGRESSIVE_OUTPUT", "true").lower() == "true"
     
     # FFmpeg Settings
-    FFMPEG_AUDIO_CODEC: str = "libmp3lame"
-    FFMPEG_AUDIO_BITRATE: str = "192k"
-    FFMPEG_SAMPLE_RATE: str = "44100"
+    # Threads per process; 0 divides the CPUs by the current concurrency limit
+    FFMPEG_THREADS: int = int(os.getenv("FFMPEG_THREADS", 0))
+    # Pin each process to its own CPUs (as many as its thread budget)
+    FFMPEG_CPU_AFFINITY: bool = os.getenv("FFMPEG_CPU_AFFINITY", "false").lower() == "true"
+    # nice and ionice per priority class (ionice class 2 = best-effort, 3 = idle)
+    PRIORITY_CLASSES: Dict[str, Dict[str, int]] = {
+        "high": {"nice": 0, "ionice_class": 2, "ionice_level": 0},
+        "normal": {"nice": 5, "ionice_class": 2, "ionice_level": 4},
+        "low": {"nice": 10, "ionice_class": 2, "ionice_level": 7},
+    }
+    LANE_PRIORITIES: Dict[str, str] = {"short": "high", "default": "normal", "long": "low"}
+    FFMPEG_STDERR_LINES: int = 50  # stderr ring buffer size per process
+    FFMPEG_ERROR_EXCERPT: int = 300  # characters of stderr kept in job errors
+    # Remux sources already in a profile's codec without re-encoding
+    FFMPEG_STREAM_COPY: bool = True
+    # Opt-in: keep AAC sources as a lossless .m4a remux instead of MP3 profiles
+    FFMPEG_AAC_PASSTHROUGH: bool = os.getenv("FFMPEG_AAC_PASSTHROUGH", "false").lower() == "true"
+    
+    # Segment-parallel encoding for long inputs
+    SEGMENT_THRESHOLD: int = int(os.getenv("SEGMENT_THRESHOLD", 1200))  # seconds
+    SEGMENT_MIN_DURATION: int = 300  # seconds
+    SEGMENT_PREROLL_FRAMES: int = 8
     
     # Processing Settings
     MAX_RETRIES: int = 3
     RETRY_DELAY: int = 5  # seconds
     MAX_WORKERS: int = 3
+    PROGRESS_UPDATE_INTERVAL: float = 1.0  # seconds between progress writes per job
+
+    # Job leases: a worker renews its lease on each job every
+    # LEASE_HEARTBEAT_INTERVAL; the reaper requeues jobs whose lease has expired
+    # (up to MAX_RETRIES attempts, then fails them)
+    WORKER_ID: str = os.getenv("WORKER_ID", "")  # defaults to <hostname>:<pid>
+    LEASE_TTL: int = int(os.getenv("LEASE_TTL", 30))  # seconds
+    LEASE_HEARTBEAT_INTERVAL: int = 10  # seconds
+    REAPER_INTERVAL: int = 15  # seconds
+
+    # Duration lanes this converter consumes, each with its own job workers and
+    # FFmpeg process slots so long videos can't hold up short clips.
+    # "default" is QUEUE_NAME itself (unknown duration), others "<QUEUE_NAME>.<lane>"
+    LANES: Dict[str, int] = parse_lanes(os.getenv("CONVERTER_LANES", "short=2,long=2,default=1"))
+
+    # Fair share between users. Each lane prefetches only its running jobs plus
+    # SCHEDULER_PREFETCH_SLACK deliveries, so RabbitMQ still spreads the backlog
+    # across converter replicas, and its workers pick from that buffer by weighted
+    # deficit round-robin. A user may have SCHEDULER_USER_BUFFER jobs buffered
+    # per lane; further deliveries of theirs are deferred: parked in a delay
+    # queue and then dead-lettered back to the lane's tail, which lets other
+    # users' jobs queued behind a bulk upload through. The n-th deferral of a
+    # delivery waits SCHEDULER_DEFER_DELAYS[n] seconds (the last one repeats),
+    # so a large backlog settles into the longest delay instead of cycling.
+    # A job costs its input seconds (capped); a user's turn is worth
+    # SCHEDULER_QUANTUM seconds times the weight of the tier in the message.
+    SCHEDULER_PREFETCH_SLACK: int = int(os.getenv("SCHEDULER_PREFETCH_SLACK", 4))
+    SCHEDULER_USER_BUFFER: int = 1
+    SCHEDULER_DEFER_DELAYS: List[int] = [10, 60, 300]  # seconds
+    SCHEDULER_QUANTUM: int = 300  # seconds of input
+    SCHEDULER_DEFAULT_COST: int = 300  # seconds, for jobs of unknown duration
+    SCHEDULER_MAX_COST: int = 3600  # seconds
+    TIER_WEIGHTS: Dict[str, float] = {"free": 1.0, "pro": 4.0, "business": 8.0}
+    DEFAULT_TIER: str = "free"
+
+    # Adaptive concurrency: an AIMD controller samples CPU, load average, free
+    # memory and encode speed and resizes the total of LANES within bounds. The
+    # lower bound is at least one worker per lane
+    ADAPTIVE_CONCURRENCY: bool = os.getenv("ADAPTIVE_CONCURRENCY", "true").lower() == "true"
+    ADAPTIVE_INTERVAL: float = 10.0  # seconds between samples
+    ADAPTIVE_MIN_CONCURRENCY: int = int(os.getenv("ADAPTIVE_MIN_CONCURRENCY", 1))
+    ADAPTIVE_MAX_CONCURRENCY: int = int(os.getenv("ADAPTIVE_MAX_CONCURRENCY", os.cpu_count() or 2))
+    ADAPTIVE_CPU_HIGH: float = 0.90  # utilisation that counts as overload
+    ADAPTIVE_CPU_LOW: float = 0.75  # utilisation below which a slot may be added
+    ADAPTIVE_LOAD_HIGH: float = 1.5  # 1-minute load average per CPU
+    ADAPTIVE_MEM_MIN: float = 0.10  # fraction of memory that must stay available
+    ADAPTIVE_MIN_SPEED: float = 1.0  # slowest acceptable per-job speed (x realtime)
+    ADAPTIVE_DECREASE: float = 0.7  # multiplicative cut on overload
+    METRICS_COLLECTION: str = "concurrency_metrics"
+    METRICS_TTL: int = 7 * 24 * 3600  # seconds metrics are kept
 
     class Config:
         case_sensitive = True
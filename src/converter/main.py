@@ -7,6 +7,9 @@ from pathlib import Path
 
 from .services.converter import converter_service
 from .services.queue import queue_consumer
+from .services.storage import storage
+from .services.concurrency import concurrency_controller
+from .services.reaper import lease_reaper
 from .core.config import settings
 
 # Configure logging
@@ -38,7 +41,16 @@ class ConverterService:
                 )
 
             logger.info("Starting Converter Service")
+
+            # Encodes interrupted by a crash or restart leave scratch files behind
+            removed = storage.cleanup_scratch()
+            if removed:
+                logger.info(f"Removed {removed} stale scratch files")
             
+            await converter_service.ensure_indexes()
+            await concurrency_controller.start(converter_service.db)
+            lease_reaper.start()
+
             # Start consuming messages
             consumer_task = asyncio.create_task(queue_consumer.start_consuming())
             self.tasks.add(consumer_task)
@@ -67,7 +79,10 @@ class ConverterService:
             await asyncio.gather(*self.tasks, return_exceptions=True)
         
         # Close queue connection
+        await lease_reaper.stop()
+        await concurrency_controller.stop()
         await queue_consumer.close()
+        await storage.close()
         
         # Stop the event loop
         asyncio.get_running_loop().stop()
@@ -0,0 +1,131 @@
+import hashlib
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import pymongo
+from pymongo.errors import DuplicateKeyError
+
+from ..core.config import settings
+from .storage import storage
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "converted/.cache"
+
+class ConversionCache:
+    """
+    Content-addressed index of finished conversions.
+
+    Entries map (content hash, conversion profile) to a cached output object.
+    Every job gets its own link or copy of the object, so entries can be
+    evicted by least recent use without affecting jobs that used them.
+    """
+
+    def __init__(self, db):
+        self.collection = db[settings.CACHE_COLLECTION]
+        self._indexes_ready = False
+
+    async def _ensure_indexes(self) -> None:
+        if not self._indexes_ready:
+            await self.collection.create_index("last_used_at")
+            self._indexes_ready = True
+
+    @staticmethod
+    def cache_key(content_hash: str, profile: str) -> str:
+        profile_digest = hashlib.sha256(profile.encode()).hexdigest()[:16]
+        return f"{content_hash}-{profile_digest}"
+
+    async def acquire(self, content_hash: str, profile: str, job_id: str) -> Optional[Dict]:
+        """Look up a cached output for a job, marking it recently used; returns the entry on a hit"""
+        await self._ensure_indexes()
+        key = self.cache_key(content_hash, profile)
+        entry = await self.collection.find_one_and_update(
+            {"_id": key},
+            {"$set": {"last_used_at": datetime.utcnow()}},
+            return_document=pymongo.ReturnDocument.AFTER
+        )
+        if entry is None:
+            return None
+
+        if "key" not in entry or not await storage.exists(entry["key"]):
+            # The object vanished underneath the index; drop the stale entry
+            await self.collection.delete_one({"_id": key})
+            return None
+
+        logger.info(f"Conversion cache hit for job {job_id}: {key}")
+        return entry
+
+    async def store(
+        self,
+        content_hash: str,
+        profile: str,
+        job_id: str,
+        output_key: str,
+        size: Optional[int] = None,
+        media: Optional[Dict] = None
+    ) -> None:
+        """Add a freshly converted output to the cache"""
+        await self._ensure_indexes()
+        key = self.cache_key(content_hash, profile)
+        extension = os.path.splitext(output_key)[1]
+        object_key = f"{CACHE_KEY_PREFIX}/{key}{extension}"
+
+        try:
+            await storage.copy(output_key, object_key)
+            now = datetime.utcnow()
+            await self.collection.insert_one({
+                "_id": key,
+                "content_hash": content_hash,
+                "profile": profile,
+                "key": object_key,
+                "size": size,
+                "media": media,
+                "job_id": job_id,
+                "created_at": now,
+                "last_used_at": now
+            })
+            logger.info(f"Cached output of job {job_id} as {key}")
+        except DuplicateKeyError:
+            # A concurrent job with the same input won the race
+            logger.info(f"Output for {key} already cached")
+        except Exception as e:
+            logger.error(f"Error caching output of job {job_id}: {str(e)}")
+            return
+
+        await self.evict()
+
+    async def evict(self) -> int:
+        """Remove entries idle for CACHE_TTL, then the least recently used over CACHE_MAX_ENTRIES"""
+        try:
+            cutoff = datetime.utcnow() - timedelta(seconds=settings.CACHE_TTL)
+            victims = await self.collection.find(
+                {"last_used_at": {"$lt": cutoff}},
+                {"key": 1, "last_used_at": 1}
+            ).to_list(length=None)
+
+            overflow = await self.collection.count_documents({}) - len(victims) - settings.CACHE_MAX_ENTRIES
+            if overflow > 0:
+                victims += await self.collection.find(
+                    {"last_used_at": {"$gte": cutoff}},
+                    {"key": 1, "last_used_at": 1}
+                ).sort("last_used_at", pymongo.ASCENDING).limit(overflow).to_list(length=None)
+
+            evicted = 0
+            for entry in victims:
+                # A job that used the entry meanwhile bumped last_used_at and keeps it
+                result = await self.collection.delete_one(
+                    {"_id": entry["_id"], "last_used_at": entry["last_used_at"]}
+                )
+                if result.deleted_count and entry.get("key"):
+                    await storage.delete(entry["key"])
+                evicted += result.deleted_count
+
+            if evicted:
+                logger.info(f"Evicted {evicted} conversion cache entries")
+            return evicted
+
+        except Exception as e:
+            logger.error(f"Error evicting conversion cache: {str(e)}")
+            return 0
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import math
+import os
+import socket
+import time
+from collections import deque
+from datetime import datetime
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from ..core.config import settings
+from ..utils.ffmpeg import ffmpeg
+
+logger = logging.getLogger(__name__)
+
+# Receives the new per-lane limits after every resize
+LimitListener = Callable[[Dict[str, int]], Awaitable[None]]
+
+class ConcurrencyController:
+    """
+    AIMD controller for the number of concurrent FFmpeg jobs.
+
+    Every ADAPTIVE_INTERVAL it samples CPU utilisation, load average, memory
+    headroom and the encode speed jobs report. Any sign of overload cuts the
+    limit multiplicatively; a saturated but healthy host gets one more slot.
+    The total is split across lanes in proportion to LANES.
+    """
+
+    def __init__(self):
+        total = sum(settings.LANES.values())
+        # Without adaptation LANES is used as configured
+        self.total = self._clamp(total) if settings.ADAPTIVE_CONCURRENCY else total
+        self.listeners: List[LimitListener] = []
+        self.speeds: Deque[Tuple[float, float]] = deque()
+        self.collection = None
+        self.task: Optional[asyncio.Task] = None
+        self._cpu_times: Optional[Tuple[int, int]] = None
+
+    @staticmethod
+    def _clamp(total: int) -> int:
+        # Every lane keeps a worker, or the deliveries it has buffered would never run
+        floor = max(settings.ADAPTIVE_MIN_CONCURRENCY, len(settings.LANES))
+        return min(max(total, floor), max(settings.ADAPTIVE_MAX_CONCURRENCY, floor))
+
+    def lane_limits(self, total: Optional[int] = None) -> Dict[str, int]:
+        """
+        Split a total limit across lanes: every lane keeps one worker and the
+        rest is shared by configured share, by largest remainder so the lanes
+        add up to the total
+        """
+        total = max(self.total if total is None else total, len(settings.LANES))
+        spare = total - len(settings.LANES)
+        shares = sum(settings.LANES.values())
+        quotas = {lane: spare * share / shares for lane, share in settings.LANES.items()}
+        limits = {lane: 1 + math.floor(quota) for lane, quota in quotas.items()}
+        by_remainder = sorted(
+            quotas,
+            key=lambda lane: (quotas[lane] - limits[lane], settings.LANES[lane]),
+            reverse=True
+        )
+        for lane in by_remainder[:total - sum(limits.values())]:
+            limits[lane] += 1
+        return limits
+
+    def subscribe(self, listener: LimitListener) -> None:
+        self.listeners.append(listener)
+
+    def record_speed(self, speed: Optional[float]) -> None:
+        """Note the current encode speed (realtime factor) of a job reading a local file"""
+        if speed:
+            self.speeds.append((time.monotonic(), speed))
+
+    def sample(self) -> Dict:
+        """Current load signals; None where the platform doesn't provide one"""
+        cutoff = time.monotonic() - 2 * settings.ADAPTIVE_INTERVAL
+        while self.speeds and self.speeds[0][0] < cutoff:
+            self.speeds.popleft()
+
+        limiters = [ffmpeg.limiter(lane) for lane in settings.LANES]
+        return {
+            "cpu": self._cpu_utilisation(),
+            "load": _load_per_cpu(),
+            "mem_available": _memory_available(),
+            "speed": (
+                round(sum(speed for _, speed in self.speeds) / len(self.speeds), 2)
+                if self.speeds else None
+            ),
+            "active": sum(limiter.active for limiter in limiters),
+            "waiting": sum(limiter.waiting for limiter in limiters),
+        }
+
+    def decide(self, sample: Dict) -> Tuple[str, int, str]:
+        """
+        Choose the next total limit from a sample
+        Returns: (action, new_total, reason)
+        """
+        overload = []
+        if sample["cpu"] is not None and sample["cpu"] >= settings.ADAPTIVE_CPU_HIGH:
+            overload.append(f"cpu {sample['cpu']:.2f}")
+        if sample["load"] is not None and sample["load"] >= settings.ADAPTIVE_LOAD_HIGH:
+            overload.append(f"load {sample['load']:.2f}")
+        if sample["mem_available"] is not None and sample["mem_available"] < settings.ADAPTIVE_MEM_MIN:
+            overload.append(f"memory {sample['mem_available']:.2f}")
+        if sample["speed"] is not None and sample["speed"] < settings.ADAPTIVE_MIN_SPEED:
+            overload.append(f"speed {sample['speed']}x")
+
+        if overload:
+            total = self._clamp(math.floor(self.total * settings.ADAPTIVE_DECREASE))
+            return ("decrease" if total < self.total else "hold"), total, ", ".join(overload)
+
+        saturated = sample["waiting"] > 0 or sample["active"] >= self.total
+        if not saturated:
+            return "hold", self.total, "idle capacity"
+        if sample["cpu"] is not None and sample["cpu"] >= settings.ADAPTIVE_CPU_LOW:
+            return "hold", self.total, f"cpu {sample['cpu']:.2f}"
+
+        total = self._clamp(self.total + 1)
+        return ("increase" if total > self.total else "hold"), total, "saturated with headroom"
+
+    async def apply(self, total: int) -> None:
+        self.total = total
+        limits = self.lane_limits()
+        for lane, limit in limits.items():
+            ffmpeg.limiter(lane).resize(limit)
+        for listener in self.listeners:
+            await listener(limits)
+
+    async def run(self) -> None:
+        self._cpu_utilisation()  # Prime the CPU counters
+        while True:
+            await asyncio.sleep(settings.ADAPTIVE_INTERVAL)
+            try:
+                sample = self.sample()
+                action, total, reason = self.decide(sample)
+                if total != self.total:
+                    await self.apply(total)
+                await self.record(sample, action, reason)
+            except Exception as e:
+                logger.error(f"Concurrency controller error: {str(e)}")
+
+    async def record(self, sample: Dict, action: str, reason: str) -> None:
+        """Log a decision and store it as a metric so limits can be audited"""
+        message = (
+            f"Concurrency {action} to {self.total} ({reason}): "
+            f"cpu={sample['cpu']} load={sample['load']} mem={sample['mem_available']} "
+            f"speed={sample['speed']} active={sample['active']} waiting={sample['waiting']}"
+        )
+        if action == "hold":
+            logger.debug(message)
+        else:
+            logger.info(message)
+
+        if self.collection is not None:
+            await self.collection.insert_one({
+                "host": socket.gethostname(),
+                "timestamp": datetime.utcnow(),
+                "action": action,
+                "reason": reason,
+                "limit": self.total,
+                "lane_limits": self.lane_limits(),
+                **sample
+            })
+
+    async def start(self, db=None) -> None:
+        """Apply the initial limits and, if enabled, start adapting them"""
+        if db is not None:
+            self.collection = db[settings.METRICS_COLLECTION]
+            await self.collection.create_index(
+                "timestamp", expireAfterSeconds=settings.METRICS_TTL
+            )
+        await self.apply(self.total)
+        if settings.ADAPTIVE_CONCURRENCY:
+            self.task = asyncio.create_task(self.run())
+            logger.info(
+                f"Adaptive concurrency started at {self.total} "
+                f"(bounds {settings.ADAPTIVE_MIN_CONCURRENCY}-{settings.ADAPTIVE_MAX_CONCURRENCY})"
+            )
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    def _cpu_utilisation(self) -> Optional[float]:
+        """Busy fraction of all CPUs since the previous call, from /proc/stat"""
+        try:
+            with open("/proc/stat") as stat_file:
+                fields = [int(value) for value in stat_file.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)  # idle + iowait
+        total = sum(fields[:8])  # guest time is already counted in user time
+
+        previous, self._cpu_times = self._cpu_times, (idle, total)
+        if previous is None or total <= previous[1]:
+            return None
+        return round(1 - (idle - previous[0]) / (total - previous[1]), 3)
+
+def _load_per_cpu() -> Optional[float]:
+    try:
+        return round(os.getloadavg()[0] / (os.cpu_count() or 1), 3)
+    except OSError:
+        return None
+
+def _memory_available() -> Optional[float]:
+    """Fraction of memory available to new processes, from /proc/meminfo"""
+    try:
+        meminfo = {}
+        with open("/proc/meminfo") as meminfo_file:
+            for line in meminfo_file:
+                name, _, value = line.partition(":")
+                meminfo[name] = int(value.split()[0])
+        return round(meminfo["MemAvailable"] / meminfo["MemTotal"], 3)
+    except (OSError, KeyError, ValueError, IndexError):
+        return None
+
+concurrency_controller = ConcurrencyController()
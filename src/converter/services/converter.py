@@ -1,15 +1,27 @@
 import os
+import time
+import asyncio
+import socket
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
+import httpx
 import motor.motor_asyncio
-from typing import Dict, Optional
+import pymongo
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
 
 from ..core.config import settings
 from ..core.exceptions import StorageError, DatabaseError
-from ..utils.ffmpeg import ffmpeg
+from ..utils.ffmpeg import ffmpeg, ProgressCallback, split_error
+from .planner import planner
+from .cache import ConversionCache
+from .storage import storage
+from .concurrency import concurrency_controller
 
 logger = logging.getLogger(__name__)
 
+# Identifies this converter process as the holder of job leases
+WORKER_ID = settings.WORKER_ID or f"{socket.gethostname()}:{os.getpid()}"
+
 class ConverterService:
     def __init__(self):
         os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
@@ -19,12 +31,176 @@ class ConverterService:
         self.client = motor.motor_asyncio.AsyncIOMotorClient(settings.MONGODB_URL)
         self.db = self.client[settings.MONGODB_DB]
         self.collection = self.db[settings.MONGODB_COLLECTION]
+        self.cache = ConversionCache(self.db) if settings.CACHE_ENABLED else None
+        # Jobs this process is converting right now
+        self.running: Set[str] = set()
+
+    async def ensure_indexes(self) -> None:
+        """Indexes the lease claim and the reaper rely on"""
+        try:
+            await self.collection.create_index("job_id", unique=True)
+        except pymongo.errors.OperationFailure as e:
+            # Existing duplicates; claims still work, only less strictly
+            logger.error(f"Could not create unique job_id index: {str(e)}")
+        await self.collection.create_index(
+            [("status", pymongo.ASCENDING), ("lease_expires_at", pymongo.ASCENDING)]
+        )
+
+    async def claim_job(self, job_id: str, task: Dict[str, Any]) -> bool:
+        """
+        Take the job's lease unless another live worker holds it or the job is
+        already finished, so redelivered or requeued messages can't run a job twice
+        """
+        if job_id in self.running:
+            # A redelivery of a job this process is still converting
+            return False
+        # Reserved before the first await so a concurrent duplicate sees it
+        self.running.add(job_id)
+        try:
+            job = await self._take_lease(job_id, task)
+        except Exception:
+            self.running.discard(job_id)
+            raise
+        if job is None:
+            self.running.discard(job_id)
+        return job is not None
+
+    async def _take_lease(self, job_id: str, task: Dict[str, Any]) -> Optional[Dict]:
+        now = datetime.utcnow()
+        await self.collection.update_one(
+            {"job_id": job_id},
+            {"$setOnInsert": {"job_id": job_id, "status": "queued", "created_at": now}},
+            upsert=True
+        )
+        # Our own WORKER_ID only matches leases left by a previous run of a
+        # worker with a fixed WORKER_ID; running jobs were refused above
+        return await self.collection.find_one_and_update(
+            {
+                "job_id": job_id,
+                "status": {"$nin": ["completed", "failed"]},
+                "$or": [
+                    {"lease_owner": None},
+                    {"lease_owner": WORKER_ID},
+                    {"lease_expires_at": {"$lt": now}},
+                ],
+            },
+            {
+                "$set": {
+                    "lease_owner": WORKER_ID,
+                    "lease_expires_at": now + timedelta(seconds=settings.LEASE_TTL),
+                    "heartbeat_at": now,
+                    "task": task,
+                },
+                "$inc": {"attempts": 1},
+            }
+        )
 
-    async def process_video(self, job_id: str, file_path: str, user_id: str) -> Dict:
-        """Process video conversion job"""
+    async def renew_lease(self, job_id: str) -> bool:
+        """Extend the lease; False once another worker has taken it over"""
+        now = datetime.utcnow()
+        result = await self.collection.update_one(
+            {"job_id": job_id, "lease_owner": WORKER_ID},
+            {"$set": {
+                "lease_expires_at": now + timedelta(seconds=settings.LEASE_TTL),
+                "heartbeat_at": now,
+            }}
+        )
+        return result.matched_count > 0
+
+    async def release_lease(self, job_id: str, requeue: bool = False) -> None:
+        """Give up the lease; an interrupted job goes back to 'queued'"""
+        update: Dict[str, Any] = {"$unset": {"lease_owner": "", "lease_expires_at": ""}}
+        if requeue:
+            update["$set"] = {"status": "queued", "updated_at": datetime.utcnow()}
+        await self.collection.update_one(
+            {"job_id": job_id, "lease_owner": WORKER_ID, "status": {"$nin": ["completed", "failed"]}},
+            update
+        )
+
+    async def process_with_lease(self, job_id: str, **kwargs) -> Dict:
+        """
+        Run process_video while heartbeating the job's lease. If the lease is
+        lost (the reaper gave the job to another worker) the conversion is
+        cancelled and the result is marked lease_lost.
+        """
+        job_task = asyncio.create_task(self.process_video(job_id=job_id, **kwargs))
+        heartbeat_task = asyncio.create_task(self._heartbeat(job_id, job_task))
+        try:
+            await asyncio.wait({job_task})
+            if job_task.cancelled():
+                return {"success": False, "error": "Job lease lost", "lease_lost": True}
+            return job_task.result()
+        finally:
+            heartbeat_task.cancel()
+            interrupted = not job_task.done()
+            if interrupted:
+                job_task.cancel()
+            await asyncio.gather(job_task, heartbeat_task, return_exceptions=True)
+            self.running.discard(job_id)
+            ffmpeg.abandoned.discard(job_id)
+            try:
+                await self.release_lease(job_id, requeue=interrupted)
+            except Exception as e:
+                logger.error(f"Error releasing lease of job {job_id}: {str(e)}")
+
+    async def _heartbeat(self, job_id: str, job_task: asyncio.Task) -> None:
+        while True:
+            await asyncio.sleep(settings.LEASE_HEARTBEAT_INTERVAL)
+            try:
+                if not await self.renew_lease(job_id):
+                    logger.warning(f"Lost lease of job {job_id}, cancelling conversion")
+                    ffmpeg.abandon(job_id)
+                    job_task.cancel()
+                    return
+            except Exception as e:
+                # Keep converting; the lease only expires after LEASE_TTL
+                logger.error(f"Error renewing lease of job {job_id}: {str(e)}")
+
+    async def process_video(
+        self,
+        job_id: str,
+        file_path: Optional[str],
+        user_id: str,
+        content_hash: Optional[str] = None,
+        profiles: Optional[List[str]] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        input_url: Optional[str] = None,
+        input_key: Optional[str] = None,
+        lane: str = "default"
+    ) -> Dict:
+        """
+        Process video conversion job. The upload is read from storage under
+        input_key (file_path for older messages); jobs with an input_url are
+        streamed from the gateway relay into FFmpeg instead.
+        """
+        fetched = False
+        interrupted = False
         try:
             # Log the incoming request
-            logger.info(f"Starting conversion for job_id: {job_id}, file: {file_path}")
+            logger.info(
+                f"Starting conversion for job_id: {job_id}, "
+                f"file: {input_key or file_path or 'relayed upload'}"
+            )
+            profiles = planner.resolve_profiles(profiles)
+
+            # Identical input and settings: reuse earlier outputs, skip FFmpeg
+            cached: Dict[str, Dict] = {}
+            media_info: Dict = {}
+            if self.cache and content_hash:
+                cached, media_info = await self.lookup_cache(
+                    job_id, content_hash, profiles, start, end
+                )
+                if len(cached) == len(profiles):
+                    return await self.complete_job(
+                        job_id, [cached[name] for name in profiles], media_info
+                    )
+
+            if input_url:
+                return await self.process_stream(job_id, input_url, profiles, start, end, lane)
+
+            if input_key:
+                file_path, fetched = await storage.fetch(input_key)
 
             # First verify the file exists
             if not os.path.exists(file_path):
@@ -33,47 +209,71 @@ class ConverterService:
                 await self.update_job_status(job_id, "failed", error_msg)
                 return {"success": False, "error": error_msg}
 
-            # Update job status in database
-            await self.update_job_status(job_id, "processing")
-            
-            # Validate input file
-            logger.info(f"Validating file for job {job_id}")
-            is_valid, error = await ffmpeg.validate_file(file_path)
+            # Probe once; the result both validates the input and drives the plan
+            logger.info(f"Probing file for job {job_id}")
+            remaining = [name for name in profiles if name not in cached]
+            is_valid, media_info, error = await ffmpeg.probe(file_path, lane)
+            if is_valid:
+                is_valid, plan, error = planner.build_plan(
+                    media_info, remaining, start, end, workers=ffmpeg.limiter(lane).limit
+                )
             if not is_valid:
                 logger.error(f"File validation failed for job {job_id}: {error}")
-                await self.update_job_status(job_id, "failed", error)
+                await self.update_job_status(
+                    job_id,
+                    "failed",
+                    error,
+                    media=media_info,
+                    error_code=split_error(error)[0] or "invalid_input"
+                )
                 return {"success": False, "error": error}
 
-            # Generate output path
-            output_path = os.path.join(
-                settings.OUTPUT_DIR,
-                f"{job_id}.mp3"
+            # Update job status in database
+            await self.update_job_status(
+                job_id, "processing", media=media_info, stream_path=self.stream_path(job_id, plan)
             )
-            logger.info(f"Output path for job {job_id}: {output_path}")
 
-            # Convert file
-            logger.info(f"Starting conversion for job {job_id}")
-            success, conv_output_path, error = await ffmpeg.convert_to_mp3(file_path, job_id)
+            # Convert file into every remaining profile with one decode
+            logger.info(f"Starting conversion of job {job_id} into {', '.join(remaining)}")
+            success, artifacts, error = await ffmpeg.convert(
+                file_path,
+                job_id,
+                plan,
+                on_progress=self.progress_reporter(job_id, plan.get("duration")),
+                lane=lane
+            )
             
             if not success:
                 logger.error(f"Conversion failed for job {job_id}: {error}")
-                await self.update_job_status(job_id, "failed", error)
+                await self.update_job_status(
+                    job_id, "failed", error, error_code=split_error(error)[0]
+                )
                 return {"success": False, "error": error}
 
             logger.info(f"Conversion successful for job {job_id}")
 
-            # Update job status
-            await self.update_job_status(
-                job_id, 
-                "completed",
-                output_path=conv_output_path
+            if self.cache and content_hash:
+                for artifact in artifacts:
+                    await self.cache.store(
+                        content_hash,
+                        planner.profile_key(artifact["profile"], start, end),
+                        job_id,
+                        artifact["key"],
+                        artifact["size"],
+                        media_info
+                    )
+
+            converted = {artifact["profile"]: artifact for artifact in artifacts}
+            return await self.complete_job(
+                job_id,
+                [cached.get(name) or converted[name] for name in profiles],
+                media_info
             )
 
-            return {
-                "success": True,
-                "job_id": job_id,
-                "output_path": conv_output_path
-            }
+        except asyncio.CancelledError:
+            # Keep the upload so the requeued job can run again
+            interrupted = True
+            raise
 
         except Exception as e:
             logger.error(f"Error processing video for job {job_id}: {str(e)}")
@@ -81,20 +281,179 @@ class ConverterService:
             return {"success": False, "error": str(e)}
 
         finally:
-            # Cleanup input file
-            if os.path.exists(file_path):
-                try:
+            # Cleanup input file and any local copy of it
+            try:
+                if input_key and not interrupted:
+                    await storage.delete(input_key)
+                if file_path and (fetched or not (input_key or interrupted)) and os.path.exists(file_path):
                     os.remove(file_path)
-                    logger.info(f"Cleaned up input file for job {job_id}: {file_path}")
-                except Exception as e:
-                    logger.error(f"Error cleaning up file for job {job_id}: {str(e)}")
+                logger.info(f"Cleaned up input file for job {job_id}")
+            except Exception as e:
+                logger.error(f"Error cleaning up file for job {job_id}: {str(e)}")
+
+    async def process_stream(
+        self,
+        job_id: str,
+        input_url: str,
+        profiles: List[str],
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        lane: str = "default"
+    ) -> Dict:
+        """Convert an upload piped from the gateway relay; nothing touches the upload volume"""
+        is_valid, plan, error = planner.build_stream_plan(profiles, start, end)
+        if not is_valid:
+            await self.update_job_status(job_id, "failed", error, error_code="invalid_input")
+            return {"success": False, "error": error}
+
+        await self.update_job_status(
+            job_id, "processing", stream_path=self.stream_path(job_id, plan)
+        )
+
+        logger.info(f"Starting streamed conversion of job {job_id} into {', '.join(profiles)}")
+        success, artifacts, error = await ffmpeg.convert(
+            input_url,
+            job_id,
+            plan,
+            # Paced by the upload, so its speed says nothing about host load
+            on_progress=self.progress_reporter(job_id, plan.get("duration"), record_speed=False),
+            stdin_source=self.fetch_input(input_url),
+            lane=lane
+        )
+        if not success:
+            logger.error(f"Streamed conversion failed for job {job_id}: {error}")
+            await self.update_job_status(
+                job_id, "failed", error, error_code=split_error(error)[0]
+            )
+            return {"success": False, "error": error}
+
+        return await self.complete_job(job_id, artifacts, {})
+
+    def stream_path(self, job_id: str, plan: Dict) -> Optional[str]:
+        """Where the gateway can tail the primary output, if it shares the output volume"""
+        if not plan.get("progressive"):
+            return None
+        return storage.partial_path(ffmpeg.output_key(job_id, plan["outputs"][0]))
+
+    async def fetch_input(self, input_url: str) -> AsyncIterator[bytes]:
+        """Read a relayed upload from the gateway as it arrives"""
+        timeout = httpx.Timeout(settings.RELAY_TIMEOUT, connect=10)
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            async with client.stream("GET", input_url) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes():
+                    yield chunk
+
+    async def complete_job(self, job_id: str, artifacts: List[Dict], media_info: Dict) -> Dict:
+        """Record the job's artifacts; the first requested profile is the primary output"""
+        await self.update_job_status(
+            job_id,
+            "completed",
+            output_path=artifacts[0]["path"],
+            output_key=artifacts[0]["key"],
+            media=media_info,
+            outputs=artifacts
+        )
+        return {
+            "success": True,
+            "job_id": job_id,
+            "output_path": artifacts[0]["path"],
+            "output_key": artifacts[0]["key"],
+            "outputs": artifacts
+        }
+
+    async def lookup_cache(
+        self,
+        job_id: str,
+        content_hash: str,
+        profiles: List[str],
+        start: Optional[float] = None,
+        end: Optional[float] = None
+    ) -> Tuple[Dict[str, Dict], Dict]:
+        """
+        Link cached outputs for the requested profiles into the job
+        Returns: (artifacts by profile, cached media info)
+        """
+        cached: Dict[str, Dict] = {}
+        media_info: Dict = {}
+        try:
+            for name in profiles:
+                entry = await self.cache.acquire(
+                    content_hash, planner.profile_key(name, start, end), job_id
+                )
+                if not entry:
+                    continue
+
+                extension = os.path.splitext(entry["key"])[1]
+                output_key = f"converted/{job_id}_{name}{extension}"
+                await storage.copy(entry["key"], output_key)
+                cached[name] = {
+                    "profile": name,
+                    "key": output_key,
+                    "path": storage.local_path(output_key),
+                    "format": extension.lstrip("."),
+                    "mode": "cached",
+                    "size": entry.get("size"),
+                }
+                media_info = entry.get("media") or media_info
+
+        except Exception as e:
+            logger.error(f"Conversion cache lookup failed for job {job_id}: {str(e)}")
+            return {}, {}
+
+        return cached, media_info
+
+    def progress_reporter(
+        self, job_id: str, duration: Optional[float], record_speed: bool = True
+    ) -> ProgressCallback:
+        """
+        Build a callback that writes job progress at most once per interval.
+        With record_speed, the encode speed feeds the concurrency controller.
+        """
+        last_write = 0.0
+
+        async def report(progress: Dict) -> None:
+            nonlocal last_write
+            now = time.monotonic()
+            if now - last_write < settings.PROGRESS_UPDATE_INTERVAL:
+                return
+            last_write = now
+            if record_speed:
+                concurrency_controller.record_speed(progress["speed"])
+
+            update_data = {"progress_updated_at": datetime.utcnow()}
+            if duration:
+                # Stay below 100 until the job is actually marked completed
+                update_data["progress"] = round(
+                    min(progress["out_time"] / duration * 100, 99.9), 1
+                )
+                if progress["speed"]:
+                    remaining = max(duration - progress["out_time"], 0)
+                    update_data["eta_seconds"] = round(remaining / progress["speed"], 1)
+            if progress["speed"]:
+                update_data["speed"] = progress["speed"]
+
+            try:
+                await self.collection.update_one(
+                    {"job_id": job_id},
+                    {"$set": update_data}
+                )
+            except Exception as e:
+                logger.warning(f"Error updating progress for job {job_id}: {str(e)}")
+
+        return report
 
     async def update_job_status(
         self,
         job_id: str,
         status: str,
         error: Optional[str] = None,
-        output_path: Optional[str] = None
+        output_path: Optional[str] = None,
+        media: Optional[Dict] = None,
+        error_code: Optional[str] = None,
+        outputs: Optional[List[Dict]] = None,
+        stream_path: Optional[str] = None,
+        output_key: Optional[str] = None
     ) -> None:
         """Update job status in database"""
         try:
@@ -105,13 +464,37 @@ class ConverterService:
             
             if error:
                 update_data["error"] = error
+
+            if error_code:
+                update_data["error_code"] = error_code
+
+            if status == "completed":
+                update_data["progress"] = 100.0
+                update_data["eta_seconds"] = 0
+
+            update = {"$set": update_data}
+            if status in ("completed", "failed"):
+                # Finished jobs hold no lease
+                update["$unset"] = {"lease_owner": "", "lease_expires_at": ""}
             
             if output_path:
                 update_data["output_path"] = output_path
 
+            if output_key:
+                update_data["output_key"] = output_key
+
+            if media:
+                update_data["media"] = media
+
+            if outputs:
+                update_data["outputs"] = outputs
+
+            if stream_path:
+                update_data["stream_path"] = stream_path
+
             await self.collection.update_one(
                 {"job_id": job_id},
-                {"$set": update_data},
+                update,
                 upsert=True
             )
             
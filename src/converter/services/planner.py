@@ -0,0 +1,258 @@
+import logging
+import math
+from typing import Dict, List, Optional, Tuple
+
+from ..core.config import settings
+from ..utils.ffmpeg import MP3_FRAME_SAMPLES
+
+logger = logging.getLogger(__name__)
+
+COPY_ARGS = ["-acodec", "copy"]
+
+# Bitrates (kbps) and sample rates each encoder accepts
+MP3_BITRATES = [32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+ENCODER_SAMPLE_RATES = {
+    "libmp3lame": [8000, 11025, 12000, 16000, 22050, 24000, 32000, 44100, 48000],
+    "libopus": [8000, 12000, 16000, 24000, 48000],
+    "aac": [8000, 11025, 12000, 16000, 22050, 24000, 32000, 44100, 48000],
+}
+
+# Containers that stay playable while they are still being written
+STREAMABLE_EXTENSIONS = {".mp3", ".opus"}
+
+# Source codec that each encoder can pass through untouched
+ENCODER_SOURCE_CODECS = {
+    "libmp3lame": "mp3",
+    "libopus": "opus",
+    "aac": "aac",
+}
+
+class ConversionPlanner:
+    def select_audio_stream(self, media_info: Dict) -> Optional[Dict]:
+        """Pick the default audio stream, falling back to the first one"""
+        audio_streams = media_info.get("audio_streams", [])
+        for stream in audio_streams:
+            if stream.get("default"):
+                return stream
+        return audio_streams[0] if audio_streams else None
+
+    def resolve_profiles(self, profiles: Optional[List[str]] = None) -> List[str]:
+        """Requested profile names, deduplicated, or the default profile"""
+        names = list(dict.fromkeys(profiles or [])) or [settings.DEFAULT_PROFILE]
+        unknown = [name for name in names if name not in settings.OUTPUT_PROFILES]
+        if unknown:
+            raise ValueError(f"Unknown output profiles: {', '.join(unknown)}")
+        return names
+
+    def encode_args(self, output: Dict) -> List[str]:
+        args = ["-acodec", output["codec"]]
+        if output.get("quality") is not None:
+            args += ["-q:a", str(output["quality"])]
+        else:
+            args += ["-ab", f"{output['bitrate'] // 1000}k"]
+        args += ["-ar", str(output["sample_rate"])]
+        if output.get("channels"):
+            args += ["-ac", str(output["channels"])]
+        return args
+
+    def adapt_to_source(self, profile: Dict, stream: Dict) -> Dict:
+        """
+        Fit bitrate, sample rate and channels to the source, capped by the profile.
+        Never upscales: re-encoding a 64 kbps source at 192k adds bytes, not quality.
+        """
+        codec = profile["codec"]
+        cap = _bitrate_to_int(profile.get("bitrate"))
+        sample_rate = profile["sample_rate"]
+        channels = None
+
+        source_channels = stream.get("channels")
+        if source_channels == 1:
+            channels = 1
+            if cap and settings.ADAPTIVE_BITRATE:
+                # Mono needs about half the bits of stereo at the same quality
+                cap //= 2
+        elif source_channels and source_channels > 2:
+            channels = 2
+
+        source_rate = stream.get("sample_rate")
+        if settings.ADAPTIVE_BITRATE and source_rate and source_rate < sample_rate:
+            supported = [rate for rate in ENCODER_SAMPLE_RATES.get(codec, []) if rate >= source_rate]
+            sample_rate = min(supported) if supported else sample_rate
+
+        bitrate = cap
+        source_bitrate = stream.get("bit_rate")
+        if settings.ADAPTIVE_BITRATE and cap and source_bitrate and source_bitrate < cap:
+            bitrate = min(_round_bitrate(codec, source_bitrate), cap)
+        if bitrate and codec == "libmp3lame" and sample_rate < 32000:
+            # MPEG-2 Layer III tops out at 160 kbps
+            bitrate = min(bitrate, 160000)
+
+        return {
+            "bitrate": bitrate,
+            "quality": profile.get("quality"),
+            "sample_rate": sample_rate,
+            "channels": channels,
+            "preset_bitrate": _bitrate_to_int(profile.get("bitrate")),
+        }
+
+    def select_output(self, name: str, stream: Dict) -> Dict:
+        """Remux compatible audio as-is, re-encode everything else"""
+        profile = settings.OUTPUT_PROFILES[name]
+        codec = stream.get("codec")
+        if settings.FFMPEG_STREAM_COPY and codec == ENCODER_SOURCE_CODECS.get(profile["codec"]):
+            # A copy must not exceed the bitrate the profile asks for; a source
+            # of unknown bitrate might, so it is re-encoded
+            cap = _bitrate_to_int(profile.get("bitrate"))
+            source_bitrate = stream.get("bit_rate")
+            if cap is None or (source_bitrate is not None and source_bitrate <= cap):
+                return {"profile": name, "mode": "copy", "extension": profile["extension"],
+                        "codec_args": COPY_ARGS}
+        if settings.FFMPEG_AAC_PASSTHROUGH and codec == "aac" and profile["codec"] == "libmp3lame":
+            return {"profile": name, "mode": "copy", "extension": ".m4a", "codec_args": COPY_ARGS}
+        output = {
+            "profile": name,
+            "mode": "encode",
+            "extension": profile["extension"],
+            "codec": profile["codec"],
+            **self.adapt_to_source(profile, stream),
+        }
+        output["codec_args"] = self.encode_args(output)
+        return output
+
+    def split_segments(self, duration: float, sample_rate: int, workers: int) -> List[Dict]:
+        """Cut a duration into MP3-frame-aligned segments, one per FFmpeg slot of the lane"""
+        frame = MP3_FRAME_SAMPLES / sample_rate
+        count = min(workers, int(duration // settings.SEGMENT_MIN_DURATION))
+        if count < 2:
+            return []
+
+        frames_per_segment = math.ceil(duration / frame / count)
+        preroll = settings.SEGMENT_PREROLL_FRAMES * frame
+        segments = []
+        for i in range(count):
+            start = i * frames_per_segment * frame
+            segments.append({
+                "start": start,
+                "duration": frames_per_segment * frame,
+                "preroll": preroll if i else 0.0,
+            })
+        return segments
+
+    def profile_key(
+        self,
+        name: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None
+    ) -> str:
+        """Identify a profile's output settings so cached conversions are reused safely"""
+        profile = settings.OUTPUT_PROFILES[name]
+        return ";".join([
+            f"clip={start or 0}-{end if end is not None else 'end'}",
+            name,
+            " ".join(f"{key}={profile[key]}" for key in sorted(profile)),
+            f"copy={int(settings.FFMPEG_STREAM_COPY)}",
+            f"aac={int(settings.FFMPEG_AAC_PASSTHROUGH)}",
+            f"adaptive={int(settings.ADAPTIVE_BITRATE)}",
+        ])
+
+    def build_stream_plan(
+        self,
+        profiles: List[str],
+        start: Optional[float] = None,
+        end: Optional[float] = None
+    ) -> Tuple[bool, Dict, str]:
+        """
+        Plan for input piped in from the gateway relay, which can't be probed
+        without consuming it: first audio stream, profile defaults, one pass
+        """
+        media_info = {"duration": None, "audio_streams": [{"index": "a:0", "default": True}]}
+        return self.build_plan(media_info, profiles, start, end)
+
+    def build_plan(
+        self,
+        media_info: Dict,
+        profiles: List[str],
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        workers: int = 1
+    ) -> Tuple[bool, Dict, str]:
+        """
+        Validate probed media and choose how to convert it. Long inputs are
+        split into at most workers segments, the lane's current FFmpeg slots.
+        Returns: (is_valid, plan, error_message)
+        """
+        stream = self.select_audio_stream(media_info)
+        if stream is None:
+            return False, {}, "No audio stream found in input file"
+        if stream.get("bit_rate") is None and _audio_only(media_info):
+            # Some containers (e.g. MP3) only report the overall bitrate, which
+            # is the stream's own when it is the only one
+            stream = {**stream, "bit_rate": media_info.get("bit_rate")}
+
+        duration = media_info.get("duration") or stream.get("duration")
+        if duration is not None and duration <= 0:
+            return False, {}, "Input file has no playable duration"
+
+        clip = None
+        if start is not None or end is not None:
+            start = start or 0.0
+            if duration is not None:
+                if start >= duration:
+                    return False, {}, f"Clip start {start}s is beyond the input duration"
+                end = min(end, duration) if end is not None else duration
+            if end is not None and end <= start:
+                return False, {}, "Clip end must be after clip start"
+            clip = {"start": start, "end": end}
+            # Everything downstream (progress, segments, savings) sees the clip length
+            if end is not None:
+                duration = end - start
+
+        plan = {
+            "audio_stream": stream["index"],
+            "source_codec": stream.get("codec"),
+            "duration": duration,
+            "clip": clip,
+            "outputs": [self.select_output(name, stream) for name in profiles],
+        }
+
+        # Segment only when every output is an MP3 encode on the same frame grid
+        outputs = plan["outputs"]
+        sample_rates = {output.get("sample_rate") for output in outputs}
+        if (
+            duration and duration >= settings.SEGMENT_THRESHOLD
+            and all(output.get("codec") == "libmp3lame" for output in outputs)
+            and len(sample_rates) == 1
+        ):
+            plan["segments"] = self.split_segments(duration, sample_rates.pop(), workers)
+
+        # Segments are joined only at the end, so they can't be tailed
+        plan["progressive"] = (
+            settings.PROGRESSIVE_OUTPUT
+            and not plan.get("segments")
+            and outputs[0]["extension"] in STREAMABLE_EXTENSIONS
+        )
+        logger.info(
+            f"Conversion plan: {[(o['profile'], o['mode'], o.get('bitrate')) for o in outputs]}, "
+            f"{len(plan.get('segments') or [])} segments"
+        )
+        return True, plan, ""
+
+def _audio_only(media_info: Dict) -> bool:
+    return len(media_info.get("audio_streams", [])) == 1 and not media_info.get("video_codecs")
+
+def _bitrate_to_int(value: Optional[str]) -> Optional[int]:
+    """Parse ffmpeg bitrates such as '192k' into bits per second"""
+    if not value:
+        return None
+    value = str(value).strip().lower()
+    multiplier = {"k": 1000, "m": 1000000}.get(value[-1], 1)
+    return int(float(value.rstrip("km")) * multiplier)
+
+def _round_bitrate(codec: str, bits_per_second: int) -> int:
+    """Smallest bitrate the encoder offers that keeps the source's detail"""
+    kbps = bits_per_second / 1000
+    if codec == "libmp3lame":
+        return next((rate for rate in MP3_BITRATES if rate >= kbps), MP3_BITRATES[-1]) * 1000
+    return int(math.ceil(kbps / 16) * 16) * 1000
+
+planner = ConversionPlanner()
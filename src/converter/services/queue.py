@@ -2,12 +2,14 @@ import aio_pika
 import json
 import logging
 import asyncio
-from typing import Optional
+from typing import Dict, Optional, Set
 from datetime import datetime
 
 from ..core.config import settings
 from ..core.exceptions import QueueError
 from .converter import converter_service
+from .scheduler import FairScheduler
+from .concurrency import concurrency_controller
 
 logger = logging.getLogger(__name__)
 
@@ -15,8 +17,13 @@ class QueueConsumer:
     def __init__(self):
         self.connection: Optional[aio_pika.Connection] = None
         self.channel: Optional[aio_pika.Channel] = None
-        self.processing_queue: Optional[aio_pika.Queue] = None
+        self.lane_channels: Dict[str, aio_pika.Channel] = {}
+        self.lane_queues: Dict[str, aio_pika.Queue] = {}
+        self.schedulers: Dict[str, FairScheduler] = {}
+        self.lane_workers: Dict[str, Set[asyncio.Task]] = {}
+        self.worker_targets: Dict[str, int] = {}
         self.notification_queue: Optional[aio_pika.Queue] = None
+        self.tasks: Set[asyncio.Task] = set()
 
     async def connect(self) -> None:
         """Establish connection to RabbitMQ"""
@@ -29,12 +36,31 @@ class QueueConsumer:
             
             # Create channel
             self.channel = await self.connection.channel()
-            
-            # Declare queues
-            self.processing_queue = await self.channel.declare_queue(
-                settings.QUEUE_NAME,
-                durable=True
-            )
+
+            # One channel per lane: QoS is per channel, so each lane caps its
+            # own unacked deliveries and RabbitMQ spreads the backlog across
+            # converter replicas instead of flooding a single worker
+            for lane in settings.LANES:
+                lane_channel = await self.connection.channel()
+                self.lane_channels[lane] = lane_channel
+                self.schedulers[lane] = FairScheduler(lane)
+                self.lane_queues[lane] = await lane_channel.declare_queue(
+                    self.queue_name(lane),
+                    durable=True
+                )
+                # Deferred deliveries wait in one of these until the queue's
+                # TTL expires them, then dead-letter back onto the end of the
+                # lane's queue. One TTL per queue, as messages only expire at the head
+                for delay in settings.SCHEDULER_DEFER_DELAYS:
+                    await lane_channel.declare_queue(
+                        self.deferred_queue_name(lane, delay),
+                        durable=True,
+                        arguments={
+                            "x-message-ttl": delay * 1000,
+                            "x-dead-letter-exchange": "",
+                            "x-dead-letter-routing-key": self.queue_name(lane),
+                        }
+                    )
             
             self.notification_queue = await self.channel.declare_queue(
                 settings.NOTIFICATION_QUEUE,
@@ -47,6 +73,59 @@ class QueueConsumer:
             logger.error(f"Failed to connect to RabbitMQ: {str(e)}")
             raise QueueError(str(e))
 
+    @staticmethod
+    def queue_name(lane: str) -> str:
+        return settings.QUEUE_NAME if lane == "default" else f"{settings.QUEUE_NAME}.{lane}"
+
+    @classmethod
+    def deferred_queue_name(cls, lane: str, delay: int) -> str:
+        return f"{cls.queue_name(lane)}.deferred.{delay}s"
+
+    @staticmethod
+    def defer_delay(deferrals: int) -> int:
+        """Seconds a delivery waits on its next deferral, given how often it was deferred"""
+        delays = settings.SCHEDULER_DEFER_DELAYS
+        return delays[min(deferrals, len(delays) - 1)]
+
+    @staticmethod
+    def prefetch(workers: int) -> int:
+        # A prefetch of 0 would mean unlimited; a lane without workers holds one
+        return workers + settings.SCHEDULER_PREFETCH_SLACK if workers else 1
+
+    async def defer(self, message: aio_pika.IncomingMessage, lane: str) -> None:
+        """Move a delivery to the back of its lane, backing off with each deferral"""
+        try:
+            headers = dict(message.headers or {})
+            try:
+                deferrals = max(int(headers.get("x-deferrals", 0)), 0)
+            except (TypeError, ValueError):
+                deferrals = 0
+            headers["x-deferrals"] = deferrals + 1
+            await self.channel.default_exchange.publish(
+                aio_pika.Message(
+                    body=message.body,
+                    headers=headers,
+                    content_type=message.content_type,
+                    delivery_mode=aio_pika.DeliveryMode.PERSISTENT
+                ),
+                routing_key=self.deferred_queue_name(lane, self.defer_delay(deferrals))
+            )
+        except Exception as e:
+            logger.error(f"Failed to defer a delivery on lane {lane}: {str(e)}")
+            await message.nack(requeue=True)
+            return
+        await message.ack()
+
+    async def publish_task(self, task: Dict) -> None:
+        """Put a conversion task (back) on the queue of its lane"""
+        await self.channel.default_exchange.publish(
+            aio_pika.Message(
+                body=json.dumps(task).encode(),
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT
+            ),
+            routing_key=self.queue_name(task.get("lane") or "default")
+        )
+
     async def publish_notification(self, user_id: str, job_id: str, status: str, error: Optional[str] = None) -> None:
         """Publish notification message"""
         try:
@@ -71,24 +150,40 @@ class QueueConsumer:
         except Exception as e:
             logger.error(f"Failed to publish notification: {str(e)}")
 
-    async def process_message(self, message: aio_pika.IncomingMessage) -> None:
+    async def process_message(self, message: aio_pika.IncomingMessage, lane: str = "default") -> None:
         """Process incoming conversion request"""
-        async with message.process():
+        # Ack once the job is done; requeue if the worker is cancelled mid-job
+        async with message.process(requeue=True):
             try:
                 # Parse message
                 body = json.loads(message.body.decode())
                 job_id = body["job_id"]
-                file_path = body["file_path"]
+                file_path = body.get("file_path")
                 user_id = body["user_id"]
 
-                logger.info(f"Processing conversion job: {job_id}")
+                # Duplicate deliveries of a running or finished job are dropped
+                if not await converter_service.claim_job(job_id, body):
+                    logger.info(f"Skipping job {job_id}: finished or leased by another worker")
+                    return
+
+                logger.info(f"Processing conversion job: {job_id} (lane: {lane})")
 
                 # Process video conversion
-                result = await converter_service.process_video(
-                    job_id=job_id,
+                result = await converter_service.process_with_lease(
+                    job_id,
                     file_path=file_path,
-                    user_id=user_id
+                    user_id=user_id,
+                    content_hash=body.get("content_hash"),
+                    profiles=body.get("profiles"),
+                    start=body.get("start"),
+                    end=body.get("end"),
+                    input_url=body.get("input_url"),
+                    input_key=body.get("input_key"),
+                    lane=lane
                 )
+                if result.get("lease_lost"):
+                    # Another worker owns the job now and will report on it
+                    return
 
                 # Send notification
                 await self.publish_notification(
@@ -110,21 +205,76 @@ class QueueConsumer:
                     )
 
     async def start_consuming(self) -> None:
-        """Start consuming messages"""
+        """Start consuming messages from every configured lane"""
         try:
             await self.connect()
-            
-            async with self.processing_queue.iterator() as queue_iter:
-                logger.info("Started consuming messages")
-                async for message in queue_iter:
-                    await self.process_message(message)
+            concurrency_controller.subscribe(self.resize_workers)
+            await asyncio.gather(*(self.consume_lane(lane) for lane in self.lane_queues))
                     
         except Exception as e:
             logger.error(f"Error consuming messages: {str(e)}")
             raise
 
+    async def consume_lane(self, lane: str) -> None:
+        """Feed a lane's deliveries to its scheduler and run its workers"""
+        scheduler = self.schedulers[lane]
+        await self.set_lane_limit(lane, concurrency_controller.lane_limits()[lane])
+
+        async with self.lane_queues[lane].iterator() as queue_iter:
+            logger.info(
+                f"Started consuming lane {lane} from {self.queue_name(lane)} "
+                f"({self.worker_targets[lane]} workers, prefetch={self.prefetch(self.worker_targets[lane])})"
+            )
+            async for message in queue_iter:
+                if scheduler.should_defer(message):
+                    await self.defer(message, lane)
+                else:
+                    scheduler.put(message)
+
+    async def resize_workers(self, limits: Dict[str, int]) -> None:
+        """Follow the concurrency controller's per-lane limits"""
+        for lane, limit in limits.items():
+            if lane in self.schedulers:
+                await self.set_lane_limit(lane, limit)
+
+    async def set_lane_limit(self, lane: str, count: int) -> None:
+        """Resize a lane's workers and its prefetch window with them"""
+        self.set_workers(lane, count)
+        # Channel-wide QoS, so the new window applies to the running consumer
+        await self.lane_channels[lane].set_qos(prefetch_count=self.prefetch(count), global_=True)
+
+    def set_workers(self, lane: str, count: int) -> None:
+        """Start workers up to count; surplus workers exit after their current job"""
+        self.worker_targets[lane] = count
+        workers = self.lane_workers.setdefault(lane, set())
+        while len(workers) < count:
+            task = asyncio.create_task(self.lane_worker(lane))
+            workers.add(task)
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+            task.add_done_callback(workers.discard)
+
+    async def lane_worker(self, lane: str) -> None:
+        """Process a lane's jobs one at a time in fair-share order; acks after each"""
+        scheduler = self.schedulers[lane]
+        workers = self.lane_workers[lane]
+        while True:
+            if len(workers) > self.worker_targets[lane]:
+                workers.discard(asyncio.current_task())
+                return
+            message = await scheduler.get()
+            try:
+                await self.process_message(message, lane)
+            except Exception as e:
+                logger.error(f"Worker for lane {lane} failed on a message: {str(e)}")
+
     async def close(self) -> None:
-        """Close RabbitMQ connection"""
+        """Cancel in-flight jobs and close RabbitMQ connection"""
+        for task in self.tasks:
+            task.cancel()
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
         if self.connection and not self.connection.is_closed:
             await self.connection.close()
             logger.info("Closed RabbitMQ connection")
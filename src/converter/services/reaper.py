@@ -0,0 +1,105 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+
+from ..core.config import settings
+from .converter import converter_service
+from .queue import queue_consumer
+
+logger = logging.getLogger(__name__)
+
+class LeaseReaper:
+    """
+    Recovers jobs whose worker stopped heartbeating. Every REAPER_INTERVAL it
+    looks for unfinished jobs with an expired lease and puts them back on
+    their lane's queue, or fails them once they have used up MAX_RETRIES
+    attempts. A crashed worker's FFmpeg processes need no cleanup here: the
+    converter is the container's init process, so they die with it.
+    """
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.reap()
+            except Exception as e:
+                logger.error(f"Lease reaper error: {str(e)}")
+            await asyncio.sleep(settings.REAPER_INTERVAL)
+
+    async def reap(self) -> int:
+        """One pass over expired leases; returns how many jobs were recovered"""
+        if queue_consumer.channel is None:
+            # Not connected yet; requeued jobs would have nowhere to go
+            return 0
+
+        now = datetime.utcnow()
+        collection = converter_service.collection
+        recovered = 0
+        async for job in collection.find(
+            {"status": {"$in": ["queued", "processing"]}, "lease_expires_at": {"$lt": now}},
+            {"job_id": 1, "lease_owner": 1, "lease_expires_at": 1, "attempts": 1, "task": 1}
+        ):
+            if await self.recover(job):
+                recovered += 1
+        return recovered
+
+    async def recover(self, job: Dict) -> bool:
+        """Requeue or fail one expired job, unless another worker got to it first"""
+        job_id = job["job_id"]
+        task = job.get("task")
+        retry = bool(task) and job.get("attempts", 0) < settings.MAX_RETRIES
+        update = {
+            "$set": {"status": "queued", "updated_at": datetime.utcnow()},
+            "$unset": {"lease_owner": "", "lease_expires_at": ""},
+        }
+        if not retry:
+            update["$set"].update({
+                "status": "failed",
+                "error": "Worker stopped responding",
+                "error_code": "lease_expired",
+            })
+
+        # Only take over the exact lease we saw expire
+        claimed = await converter_service.collection.find_one_and_update(
+            {
+                "job_id": job_id,
+                "status": {"$in": ["queued", "processing"]},
+                "lease_owner": job.get("lease_owner"),
+                "lease_expires_at": job["lease_expires_at"],
+            },
+            update
+        )
+        if claimed is None:
+            return False
+
+        if retry:
+            logger.warning(
+                f"Lease of job {job_id} held by {job.get('lease_owner')} expired, "
+                f"requeueing (attempt {job.get('attempts', 0)} of {settings.MAX_RETRIES})"
+            )
+            await queue_consumer.publish_task(task)
+        else:
+            logger.error(f"Lease of job {job_id} expired after {job.get('attempts', 0)} attempts, failing it")
+            if task and task.get("user_id"):
+                await queue_consumer.publish_notification(
+                    user_id=task["user_id"],
+                    job_id=job_id,
+                    status="failed",
+                    error="Worker stopped responding"
+                )
+        return True
+
+    def start(self) -> None:
+        self.task = asyncio.create_task(self.run())
+        logger.info(f"Lease reaper started (lease TTL {settings.LEASE_TTL}s)")
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+lease_reaper = LeaseReaper()
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import math
+import logging
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+import aio_pika
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class FairScheduler:
+    """
+    Weighted deficit round-robin over per-user queues of buffered deliveries.
+    The buffer is only the lane's small prefetch window; users with a full
+    share of it get their further deliveries deferred (see should_defer).
+
+    Each active user gets a turn in rotation; a turn adds SCHEDULER_QUANTUM
+    times the user's tier weight to their deficit, and jobs are served while
+    the deficit covers their cost (input seconds, capped). Users with nothing
+    queued drop out of the rotation, so the work per pick depends on active
+    users only, not on everyone who ever submitted a job.
+    """
+
+    def __init__(self, lane: str):
+        self.lane = lane
+        self.queues: Dict[str, Deque[Tuple[float, aio_pika.IncomingMessage]]] = {}
+        self.deficits: Dict[str, float] = {}
+        self.weights: Dict[str, float] = {}
+        self.active: Deque[str] = deque()
+        self.in_turn = False
+        self.pending = 0
+        self._ready: Optional[asyncio.Event] = None
+
+    @property
+    def ready(self) -> asyncio.Event:
+        if self._ready is None:
+            self._ready = asyncio.Event()
+        return self._ready
+
+    def should_defer(self, message: aio_pika.IncomingMessage) -> bool:
+        """Whether the sender already has their share of the buffer"""
+        user_id, _, _ = self.classify(message)
+        return len(self.queues.get(user_id, ())) >= settings.SCHEDULER_USER_BUFFER
+
+    def put(self, message: aio_pika.IncomingMessage) -> None:
+        """Queue a delivery under its user; it stays unacked until processed"""
+        user_id, weight, cost = self.classify(message)
+        queue = self.queues.get(user_id)
+        if queue is None:
+            queue = self.queues[user_id] = deque()
+            self.deficits[user_id] = 0.0
+            self.active.append(user_id)
+        # The latest message decides the weight, so tier upgrades apply at once
+        self.weights[user_id] = weight
+        queue.append((cost, message))
+        self.pending += 1
+        self.ready.set()
+
+    async def get(self) -> aio_pika.IncomingMessage:
+        """Wait for the next delivery in fair-share order"""
+        while not self.active:
+            self.ready.clear()
+            await self.ready.wait()
+        return self._next()
+
+    def _next(self) -> aio_pika.IncomingMessage:
+        while True:
+            user_id = self.active[0]
+            if not self.in_turn:
+                self.deficits[user_id] += settings.SCHEDULER_QUANTUM * self.weights[user_id]
+                self.in_turn = True
+
+            queue = self.queues[user_id]
+            cost, message = queue[0]
+            if self.deficits[user_id] >= cost:
+                queue.popleft()
+                self.pending -= 1
+                self.deficits[user_id] -= cost
+                if not queue:
+                    # Idle users leave the rotation and don't bank credit
+                    self.active.popleft()
+                    del self.queues[user_id], self.deficits[user_id], self.weights[user_id]
+                    self.in_turn = False
+                return message
+
+            # Turn spent; the next user's turn starts
+            self.active.rotate(-1)
+            self.in_turn = False
+
+    @staticmethod
+    def classify(message: aio_pika.IncomingMessage) -> Tuple[str, float, float]:
+        """(user_id, weight, cost) of a delivery; malformed fields fall back to defaults"""
+        try:
+            body = json.loads(message.body.decode())
+        except (ValueError, UnicodeDecodeError):
+            body = None
+        if not isinstance(body, dict):
+            return "", 1.0, settings.SCHEDULER_DEFAULT_COST
+
+        tier = body.get("tier")
+        if not isinstance(tier, str) or tier not in settings.TIER_WEIGHTS:
+            tier = settings.DEFAULT_TIER
+        weight = settings.TIER_WEIGHTS[tier]
+
+        duration = body.get("duration")
+        cost = settings.SCHEDULER_DEFAULT_COST
+        if isinstance(duration, (int, float)) and not isinstance(duration, bool) and math.isfinite(duration):
+            cost = duration
+
+        user_id = body.get("user_id")
+        return (
+            str(user_id) if isinstance(user_id, (str, int)) else "",
+            max(weight, 0.01),
+            min(max(cost, 1.0), settings.SCHEDULER_MAX_COST)
+        )
+
+    def stats(self) -> Dict:
+        return {"lane": self.lane, "pending": self.pending, "active_users": len(self.active)}
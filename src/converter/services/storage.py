@@ -0,0 +1,313 @@
+import asyncio
+import errno
+import logging
+import os
+import shutil
+import time
+import uuid
+import xml.etree.ElementTree as ET
+from typing import Optional, Tuple
+
+import httpx
+
+from ..core.config import settings
+from ..core.exceptions import StorageError
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+class Storage:
+    """
+    Where uploads and converted outputs live.
+
+    Objects are addressed by keys such as "uploads/<file>" and
+    "converted/<job_id>_<profile>.mp3". FFmpeg needs real files, so inputs
+    are fetched to a local path and outputs are encoded in SCRATCH_DIR and
+    published once complete, so readers never see a partial object.
+    """
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Path the gateway can read the object at directly, if there is one"""
+        return None
+
+    def writable_path(self, key: str) -> str:
+        """Scratch path FFmpeg should write an object to before it is published"""
+        os.makedirs(settings.SCRATCH_DIR, exist_ok=True)
+        return os.path.join(settings.SCRATCH_DIR, key.replace("/", "_"))
+
+    def partial_path(self, key: str) -> Optional[str]:
+        """Path the gateway can tail an object at while it is being written, if any"""
+        return None
+
+    def cleanup_scratch(self) -> int:
+        """Remove scratch files left behind by a previous run; returns the count"""
+        return _remove_stale(settings.SCRATCH_DIR)
+
+    async def fetch(self, key: str) -> Tuple[str, bool]:
+        """
+        Make an object available as a local file
+        Returns: (path, is_temporary_copy)
+        """
+        raise NotImplementedError
+
+    async def publish(self, path: str, key: str) -> int:
+        """Move a finished local file into the store; returns its size"""
+        raise NotImplementedError
+
+    async def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def copy(self, source_key: str, destination_key: str) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+class LocalStorage(Storage):
+    """Keys map onto the upload and output directories (shared volumes)"""
+
+    def __init__(self):
+        self.roots = {
+            "uploads": settings.UPLOAD_DIR,
+            "converted": settings.OUTPUT_DIR,
+        }
+
+    def local_path(self, key: str) -> str:
+        prefix, _, name = key.partition("/")
+        if prefix not in self.roots or not name or ".." in name.split("/"):
+            raise StorageError(f"Invalid storage key: {key}")
+        return os.path.join(self.roots[prefix], name)
+
+    def _destination(self, key: str) -> str:
+        path = self.local_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def partial_path(self, key: str) -> str:
+        # Same filesystem as the final path, so publishing is a plain rename
+        prefix, _, name = key.partition("/")
+        return self._destination(f"{prefix}/.partial/{name}")
+
+    def cleanup_scratch(self) -> int:
+        partial_dir = os.path.join(settings.OUTPUT_DIR, ".partial")
+        return super().cleanup_scratch() + _remove_stale(partial_dir)
+
+    async def fetch(self, key: str) -> Tuple[str, bool]:
+        return self.local_path(key), False
+
+    async def publish(self, path: str, key: str) -> int:
+        destination = self._destination(key)
+        await asyncio.to_thread(_durable_move, path, destination)
+        return os.path.getsize(destination)
+
+    async def exists(self, key: str) -> bool:
+        return os.path.exists(self.local_path(key))
+
+    async def delete(self, key: str) -> None:
+        path = self.local_path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    async def copy(self, source_key: str, destination_key: str) -> None:
+        await link_or_copy(self.local_path(source_key), self._destination(destination_key))
+
+class HTTPStorage(Storage):
+    """
+    S3-style HTTP object store: PUT/GET/HEAD/DELETE on {STORAGE_URL}/{key},
+    multipart uploads for large objects and server-side copies
+    """
+
+    def __init__(self, base_url: str, token: Optional[str] = None):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+            self._client = httpx.AsyncClient(
+                headers=headers,
+                timeout=httpx.Timeout(settings.STORAGE_TIMEOUT, connect=10)
+            )
+        return self._client
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    async def fetch(self, key: str) -> Tuple[str, bool]:
+        path = self.writable_path(f"{uuid.uuid4().hex}_{key}")
+        try:
+            async with self.client.stream("GET", self.url(key)) as response:
+                response.raise_for_status()
+                with open(path, "wb") as f:
+                    async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                        await asyncio.to_thread(f.write, chunk)
+        except Exception as e:
+            if os.path.exists(path):
+                os.remove(path)
+            raise StorageError(f"Failed to fetch {key}: {str(e)}")
+        return path, True
+
+    async def publish(self, path: str, key: str) -> int:
+        size = os.path.getsize(path)
+        try:
+            if size <= settings.STORAGE_PART_SIZE:
+                with open(path, "rb") as f:
+                    body = await asyncio.to_thread(f.read)
+                response = await self.client.put(self.url(key), content=body)
+                response.raise_for_status()
+            else:
+                await self._multipart_upload(path, key)
+        except StorageError:
+            raise
+        except Exception as e:
+            raise StorageError(f"Failed to upload {key}: {str(e)}")
+
+        os.remove(path)
+        return size
+
+    async def _multipart_upload(self, path: str, key: str) -> None:
+        url = self.url(key)
+        response = await self.client.post(url, params={"uploads": ""})
+        response.raise_for_status()
+        upload_id = _xml_text(response.content, "UploadId")
+        if not upload_id:
+            raise StorageError(f"Object store returned no upload id for {key}")
+
+        try:
+            parts = []
+            with open(path, "rb") as f:
+                while True:
+                    body = await asyncio.to_thread(f.read, settings.STORAGE_PART_SIZE)
+                    if not body:
+                        break
+                    number = len(parts) + 1
+                    response = await self.client.put(
+                        url, params={"partNumber": number, "uploadId": upload_id}, content=body
+                    )
+                    response.raise_for_status()
+                    parts.append((number, response.headers.get("ETag", "")))
+
+            manifest = "".join(
+                f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>"
+                for number, etag in parts
+            )
+            response = await self.client.post(
+                url,
+                params={"uploadId": upload_id},
+                content=f"<CompleteMultipartUpload>{manifest}</CompleteMultipartUpload>"
+            )
+            response.raise_for_status()
+        except Exception:
+            # Don't leave orphaned parts behind in the store
+            try:
+                await self.client.delete(url, params={"uploadId": upload_id})
+            except httpx.HTTPError:
+                pass
+            raise
+
+    async def exists(self, key: str) -> bool:
+        response = await self.client.head(self.url(key))
+        return response.status_code == 200
+
+    async def delete(self, key: str) -> None:
+        response = await self.client.delete(self.url(key))
+        if response.status_code not in (200, 204, 404):
+            raise StorageError(f"Failed to delete {key}: HTTP {response.status_code}")
+
+    async def copy(self, source_key: str, destination_key: str) -> None:
+        source = f"{httpx.URL(self.base_url).path.rstrip('/')}/{source_key}"
+        response = await self.client.put(
+            self.url(destination_key), headers={"x-amz-copy-source": source}
+        )
+        if response.status_code != 200:
+            raise StorageError(
+                f"Failed to copy {source_key} to {destination_key}: HTTP {response.status_code}"
+            )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+async def link_or_copy(source: str, destination: str) -> None:
+    """Hard-link a file, copying it when the link crosses filesystems"""
+    try:
+        if os.path.exists(destination):
+            os.remove(destination)
+        os.link(source, destination)
+    except OSError:
+        try:
+            await asyncio.to_thread(_durable_copy, source, destination)
+        except OSError as e:
+            raise StorageError(f"Failed to copy {source} to {destination}: {str(e)}")
+
+def _durable_move(source: str, destination: str) -> None:
+    """
+    Move a finished file into place so it appears complete or not at all:
+    fsync, then rename, copying through a temporary name across filesystems
+    """
+    _fsync(source)
+    try:
+        os.replace(source, destination)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        _durable_copy(source, destination)
+        os.remove(source)
+    _fsync(os.path.dirname(destination))
+
+def _durable_copy(source: str, destination: str) -> None:
+    temporary = f"{destination}.{uuid.uuid4().hex}.tmp"
+    try:
+        shutil.copyfile(source, temporary)
+        _fsync(temporary)
+        os.replace(temporary, destination)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+def _fsync(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _remove_stale(directory: str) -> int:
+    """Delete entries not modified for SCRATCH_STALE_AGE; live encodes keep theirs fresh"""
+    if not os.path.isdir(directory):
+        return 0
+    cutoff = time.time() - settings.SCRATCH_STALE_AGE
+    removed = 0
+    for entry in os.scandir(directory):
+        try:
+            if entry.stat(follow_symlinks=False).st_mtime >= cutoff:
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path)
+            else:
+                os.remove(entry.path)
+            removed += 1
+        except OSError as e:
+            logger.warning(f"Could not remove stale scratch entry {entry.path}: {str(e)}")
+    return removed
+
+def _xml_text(document: bytes, tag: str) -> Optional[str]:
+    """First text of a tag in an S3-style XML response, ignoring namespaces"""
+    for element in ET.fromstring(document).iter():
+        if element.tag.rsplit("}", 1)[-1] == tag:
+            return element.text
+    return None
+
+def create_storage() -> Storage:
+    if settings.STORAGE_BACKEND == "http":
+        return HTTPStorage(settings.STORAGE_URL, settings.STORAGE_TOKEN or None)
+    return LocalStorage()
+
+storage = create_storage()
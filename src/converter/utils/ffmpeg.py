@@ -1,110 +1,484 @@
 import asyncio
+import json
 import os
+import re
+import shutil
+from collections import deque
 from pathlib import Path
 import logging
-import subprocess
-from typing import Tuple
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from ..core.config import settings
+from ..services.storage import storage
+from .limiter import ResizableLimiter
 
 logger = logging.getLogger(__name__)
 
+# Samples per MPEG-1 Layer III frame
+MP3_FRAME_SAMPLES = 1152
+
+# Longest stderr line kept, in bytes
+MAX_STDERR_LINE = 1024
+
+# stderr fragments mapped to compact error codes, checked in order
+ERROR_PATTERNS = [
+    ("invalid_data", ("Invalid data found", "moov atom not found")),
+    ("missing_stream", ("matches no streams", "does not contain any stream")),
+    ("codec_error", ("Unknown encoder", "Encoder not found", "Decoder not found",
+                     "Error while opening encoder", "Error while decoding", "codec not currently supported")),
+    ("file_not_found", ("No such file or directory",)),
+    ("permission_denied", ("Permission denied",)),
+    ("disk_full", ("No space left on device",)),
+]
+
+# Receives {"out_time": seconds encoded, "speed": realtime factor or None}
+ProgressCallback = Callable[[Dict], Awaitable[None]]
+
 class FFmpegWrapper:
+    def __init__(self, max_workers: int = settings.MAX_WORKERS):
+        self.max_workers = max(1, max_workers)
+        self.limiters: Dict[str, ResizableLimiter] = {}
+        self.cpus_in_use: Set[int] = set()
+        # Jobs whose lease moved to another worker while converting here
+        self.abandoned: Set[str] = set()
+        try:
+            self.cpus = sorted(os.sched_getaffinity(0))
+        except AttributeError:  # Not available outside Linux
+            self.cpus = list(range(os.cpu_count() or 1))
+
+    def limiter(self, lane: str = "default") -> ResizableLimiter:
+        """
+        Process slots of a lane, so one lane can't take another's workers;
+        resized at runtime by the concurrency controller
+        """
+        if lane not in self.limiters:
+            self.limiters[lane] = ResizableLimiter(settings.LANES.get(lane, self.max_workers))
+        return self.limiters[lane]
+
+    def abandon(self, job_id: str) -> None:
+        """Another worker owns the job now: leave its shared partial outputs alone"""
+        self.abandoned.add(job_id)
+
+    def thread_budget(self) -> int:
+        """Threads per FFmpeg process: the CPUs divided by the current concurrency limit"""
+        if settings.FFMPEG_THREADS:
+            return settings.FFMPEG_THREADS
+        limit = sum(limiter.limit for limiter in self.limiters.values()) or self.max_workers
+        return max(1, len(self.cpus) // limit)
+
+    def _claim_cpus(self, count: int) -> List[int]:
+        """Reserve the first free CPUs for a process; empty if not enough are free"""
+        free = [cpu for cpu in self.cpus if cpu not in self.cpus_in_use]
+        if len(free) < count:
+            return []
+        claimed = free[:count]
+        self.cpus_in_use.update(claimed)
+        return claimed
+
     @staticmethod
-    async def validate_file(file_path: str) -> Tuple[bool, str]:
+    def _priority_prefix(priority: Dict) -> List[str]:
+        """ionice wrapper for a priority class; the I/O class can't be set from Python"""
+        io_class = priority.get("ionice_class")
+        if io_class is None or not shutil.which("ionice"):
+            return []
+        prefix = ["ionice", "-c", str(io_class)]
+        if io_class == 2:  # Best-effort is the only class with levels
+            prefix += ["-n", str(priority.get("ionice_level", 4))]
+        return prefix
+
+    @staticmethod
+    def _apply_priority(pid: int, priority: Dict, cpus: List[int]) -> None:
+        """Set niceness and CPU affinity of a started process"""
+        try:
+            if priority.get("nice"):
+                os.setpriority(os.PRIO_PROCESS, pid, priority["nice"])
+            if cpus:
+                os.sched_setaffinity(pid, cpus)
+        except (OSError, AttributeError) as e:
+            # Unsupported platform, or the process already exited
+            logger.debug(f"Could not apply priority to process {pid}: {str(e)}")
+
+    async def _run(
+        self,
+        command: List[str],
+        on_progress: Optional[ProgressCallback] = None,
+        stdin_source: Optional[AsyncIterator[bytes]] = None,
+        lane: str = "default"
+    ) -> Tuple[int, str, List[str]]:
         """
-        Validate if file exists and is a valid media file
-        Returns: (is_valid, error_message)
+        Run a command as an asyncio subprocess, bounded by the lane's worker pool.
+        FFmpeg gets the current thread budget and, with FFMPEG_CPU_AFFINITY, a
+        CPU set of that size; the lane's priority class sets nice and ionice.
+        Only the last FFMPEG_STDERR_LINES lines of stderr are kept.
+        With on_progress, ffmpeg's -progress stream is parsed from stdout.
+        With stdin_source, its chunks are written to the process's stdin.
+        Returns: (returncode, stdout, stderr_tail)
         """
+        priority = settings.PRIORITY_CLASSES[settings.LANE_PRIORITIES.get(lane, "normal")]
+
+        async with self.limiter(lane):
+            threads = self.thread_budget()
+            if command[0] == "ffmpeg":
+                extra = ["-hide_banner", "-nostats"]
+                if on_progress:
+                    extra += ["-progress", "pipe:1"]
+                # Global position, so they apply to decoding and filtering
+                extra += ["-threads", str(threads), "-filter_threads", str(threads)]
+                command = [command[0], *extra, *command[1:]]
+
+            cpus = self._claim_cpus(threads) if settings.FFMPEG_CPU_AFFINITY else []
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *self._priority_prefix(priority),
+                    *command,
+                    stdin=asyncio.subprocess.PIPE if stdin_source else asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+            except BaseException:
+                self.cpus_in_use.difference_update(cpus)
+                raise
+            self._apply_priority(process.pid, priority, cpus)
+            stderr_task = asyncio.create_task(self._read_tail(process.stderr))
+            feeder_task = (
+                asyncio.create_task(self._feed_stdin(process.stdin, stdin_source))
+                if stdin_source else None
+            )
+            try:
+                if on_progress is None:
+                    stdout = (await process.stdout.read()).decode(errors="replace")
+                else:
+                    await self._read_progress(process.stdout, on_progress)
+                    stdout = ""
+                stderr_tail = await stderr_task
+                await process.wait()
+                if feeder_task:
+                    if not feeder_task.done():
+                        # ffmpeg stopped reading early, e.g. the clip end was reached
+                        feeder_task.cancel()
+                    await asyncio.gather(feeder_task, return_exceptions=True)
+                    # Surface input errors, e.g. the relay going away
+                    if not feeder_task.cancelled() and feeder_task.exception():
+                        raise feeder_task.exception()
+            except asyncio.CancelledError:
+                # Don't leave an orphaned encoder running when the job is cancelled
+                stderr_task.cancel()
+                if feeder_task:
+                    feeder_task.cancel()
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                raise
+            finally:
+                self.cpus_in_use.difference_update(cpus)
+
+        return process.returncode, stdout, stderr_tail
+
+    @staticmethod
+    async def _feed_stdin(stdin: asyncio.StreamWriter, source: AsyncIterator[bytes]) -> None:
+        """Pipe input chunks into the process, respecting its read pace"""
         try:
-            if not os.path.exists(file_path):
-                return False, f"File not found: {file_path}"
+            async for chunk in source:
+                stdin.write(chunk)
+                await stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # ffmpeg exited early; its exit status says why
+            pass
+        finally:
+            if hasattr(source, "aclose"):
+                await source.aclose()
+            if not stdin.is_closing():
+                stdin.close()
 
-            result = subprocess.run(
-                ["ffmpeg", "-i", file_path],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+    @staticmethod
+    async def _read_tail(stream: asyncio.StreamReader) -> List[str]:
+        """Keep a ring buffer of the last stderr lines, however much is written"""
+        tail: Deque[str] = deque(maxlen=settings.FFMPEG_STDERR_LINES)
+        pending = b""
+        while chunk := await stream.read(64 * 1024):
+            # ffmpeg terminates status lines with \r, so split on both
+            lines = re.split(rb"[\r\n]", pending + chunk)
+            pending = lines.pop()[-MAX_STDERR_LINE:]
+            tail.extend(
+                line[:MAX_STDERR_LINE].decode(errors="replace")
+                for line in lines
+                if line.strip()
             )
+        if pending.strip():
+            tail.append(pending.decode(errors="replace"))
+        return list(tail)
 
-            if "Invalid data found" in result.stderr:
-                return False, "Invalid media file format"
+    @staticmethod
+    async def _read_progress(stream: asyncio.StreamReader, on_progress: ProgressCallback) -> None:
+        """Parse key=value blocks from -progress output as they are written"""
+        block: Dict[str, str] = {}
+        async for raw_line in stream:
+            key, _, value = raw_line.decode(errors="replace").strip().partition("=")
+            if key != "progress":
+                block[key] = value
+                continue
 
-            return True, ""
+            try:
+                out_time = int(block.get("out_time_us", "")) / 1_000_000
+            except ValueError:
+                out_time = None
+            try:
+                speed = float(block.get("speed", "").rstrip("x"))
+            except ValueError:
+                speed = None
+            block = {}
 
-        except Exception as e:
-            logger.error(f"Error validating file: {str(e)}")
-            return False, str(e)
+            if out_time is not None:
+                await on_progress({"out_time": out_time, "speed": speed})
 
     @staticmethod
-    async def convert_to_mp3(input_path: str, job_id: str) -> Tuple[bool, str, str]:
+    def output_key(job_id: str, output: Dict) -> str:
+        """Storage key an output of the plan is published under"""
+        return f"converted/{job_id}_{output['profile']}{output['extension']}"
+
+    def output_path(self, job_id: str, output: Dict, progressive: bool = False) -> str:
+        """
+        Local path FFmpeg writes an output of the plan to: scratch space, or
+        a partial file the gateway can tail for progressive outputs
         """
-        Convert video to MP3
-        Returns: (success, output_path, error_message)
+        key = self.output_key(job_id, output)
+        if progressive:
+            path = storage.partial_path(key)
+            if path:
+                return path
+        return storage.writable_path(key)
+
+    @staticmethod
+    def _clip_args(plan: Dict) -> List[str]:
         """
+        Input-side seek and length for range conversions, so ffmpeg jumps
+        straight to the range and decodes nothing outside it
+        """
+        clip = plan.get("clip")
+        if not clip:
+            return []
+        args = ["-ss", f"{clip['start']:.3f}"] if clip.get("start") else []
+        if clip.get("end") is not None:
+            args += ["-t", f"{clip['end'] - (clip.get('start') or 0):.3f}"]
+        return args
+
+    def _output_args(self, plan: Dict, output: Dict, path: str) -> List[str]:
+        """Arguments for one output of a multi-output command"""
+        return [
+            "-map", f"0:{plan['audio_stream']}",  # Selected audio stream
+            "-vn",  # Disable video
+            *output["codec_args"],
+            path
+        ]
+
+    async def convert(
+        self,
+        input_path: str,
+        job_id: str,
+        plan: Dict,
+        on_progress: Optional[ProgressCallback] = None,
+        stdin_source: Optional[AsyncIterator[bytes]] = None,
+        lane: str = "default"
+    ) -> Tuple[bool, List[Dict], str]:
+        """
+        Convert the input into every output of the plan with a single decode.
+        With stdin_source the input is piped in and input_path is ignored.
+        Returns: (success, artifacts, error_message)
+        """
+        if stdin_source:
+            input_path = "pipe:0"
+        output_paths: List[str] = []
+        interrupted = False
         try:
             # Validate input path
-            if not os.path.exists(input_path):
-                return False, "", f"Input file not found: {input_path}"
+            if not stdin_source and not os.path.exists(input_path):
+                return False, [], f"Input file not found: {input_path}"
 
-            # Create output directory
-            output_dir = Path("/tmp/converted")
-            output_dir.mkdir(parents=True, exist_ok=True)
-            output_path = str(output_dir / f"{job_id}.mp3")
+            output_paths = [
+                self.output_path(job_id, output, progressive=(i == 0 and bool(plan.get("progressive"))))
+                for i, output in enumerate(plan["outputs"])
+            ]
 
             # Log the conversion attempt
-            logger.info(f"Converting {input_path} to {output_path}")
+            logger.info(f"Converting {input_path} to {', '.join(output_paths)}")
 
-            # Run FFmpeg command
-            command = [
-                "ffmpeg",
-                "-y",  # Overwrite output file
-                "-i", input_path,  # Input file
-                "-vn",  # Disable video
-                "-acodec", "libmp3lame",  # Audio codec
-                "-ab", "192k",  # Bitrate
-                "-ar", "44100",  # Sample rate
-                output_path  # Output file
-            ]
+            if plan.get("segments") and not stdin_source:
+                returncode, stdout, stderr = await self._convert_segments(
+                    input_path, output_paths, plan, on_progress, lane
+                )
+            else:
+                # Run FFmpeg command; outputs share the decoded input stream
+                command = [
+                    "ffmpeg",
+                    "-y",  # Overwrite output files
+                    *self._clip_args(plan),
+                    "-i", input_path,  # Input file
+                ]
+                for i, (output, path) in enumerate(zip(plan["outputs"], output_paths)):
+                    if i == 0 and plan.get("progressive"):
+                        # Flush every packet so readers tailing the file see it grow
+                        output = {**output, "codec_args": [*output["codec_args"], "-flush_packets", "1"]}
+                    command += self._output_args(plan, output, path)
 
-            # Run the command and capture output
-            result = subprocess.run(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
+                # Run the command and capture output
+                returncode, stdout, stderr = await self._run(
+                    command, on_progress, stdin_source, lane
+                )
 
-            # Log the complete command output
-            if result.stdout:
-                logger.info(f"FFmpeg stdout: {result.stdout}")
-            if result.stderr:
-                logger.info(f"FFmpeg stderr: {result.stderr}")
+            if returncode != 0:
+                error = describe_error(stderr)
+                logger.error(f"FFmpeg failed with exit code {returncode}: {error}")
+                return False, [], error
 
-            if result.returncode != 0:
-                logger.error(f"FFmpeg error: {result.stderr}")
-                return False, "", f"Conversion failed: {result.stderr}"
+            artifacts = []
+            for output, path in zip(plan["outputs"], output_paths):
+                if not os.path.exists(path):
+                    return False, [], f"Output file was not created: {path}"
+                key = self.output_key(job_id, output)
+                size = await storage.publish(path, key)
+                artifact = {
+                    "profile": output["profile"],
+                    "key": key,
+                    "path": storage.local_path(key),
+                    "format": output["extension"].lstrip("."),
+                    "mode": output["mode"],
+                    "size": size,
+                }
+                for key in ("bitrate", "sample_rate", "channels"):
+                    if output.get(key):
+                        artifact[key] = output[key]
+                if output.get("preset_bitrate") and plan.get("duration"):
+                    # Compared with encoding at the profile's fixed bitrate
+                    preset_size = output["preset_bitrate"] * plan["duration"] / 8
+                    artifact["bytes_saved"] = max(int(preset_size - artifact["size"]), 0)
+                artifacts.append(artifact)
 
-            if not os.path.exists(output_path):
-                return False, "", "Output file was not created"
+            logger.info(f"Successfully converted {input_path} into {len(artifacts)} outputs")
+            return True, artifacts, ""
 
-            logger.info(f"Successfully converted {input_path} to {output_path}")
-            return True, output_path, ""
+        except asyncio.CancelledError:
+            # The job will be retried; its input must survive
+            interrupted = True
+            raise
 
         except Exception as e:
             error_msg = str(e)
             logger.error(f"Conversion error: {error_msg}")
-            return False, "", f"Error during conversion: {error_msg}"
+            return False, [], f"Error during conversion: {error_msg}"
 
         finally:
-            # Cleanup input file
+            # Cleanup input file and any outputs that were never published
             try:
-                if os.path.exists(input_path):
+                if not stdin_source and not interrupted and os.path.exists(input_path):
                     os.remove(input_path)
                     logger.info(f"Cleaned up input file: {input_path}")
+                abandoned = interrupted and job_id in self.abandoned
+                for path in output_paths:
+                    if abandoned and not path.startswith(settings.SCRATCH_DIR):
+                        # A partial file the new lease holder is writing
+                        continue
+                    if os.path.exists(path):
+                        os.remove(path)
             except Exception as e:
-                logger.error(f"Error cleaning up input file: {str(e)}")
+                logger.error(f"Error cleaning up conversion files: {str(e)}")
 
-    @staticmethod
-    async def get_file_info(file_path: str) -> Tuple[bool, dict, str]:
+    async def _convert_segments(
+        self,
+        input_path: str,
+        output_paths: List[str],
+        plan: Dict,
+        on_progress: Optional[ProgressCallback] = None,
+        lane: str = "default"
+    ) -> Tuple[int, str, List[str]]:
+        """
+        Encode time segments in parallel and join their MP3 frames.
+
+        Every segment after the first starts a few frames early and has the
+        bit reservoir disabled, so dropping that pre-roll at the concat step
+        leaves no encoder-delay gap or reservoir reference at the joins.
+        Returns: (returncode, stdout, stderr_tail) of the first failing step
+        """
+        parts_dir = Path(f"{output_paths[0]}.parts")
+        parts_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            commands = []
+            playlists: List[List[str]] = [[] for _ in output_paths]
+            clip_start = (plan.get("clip") or {}).get("start") or 0.0
+            for i, segment in enumerate(plan["segments"]):
+                preroll = segment["preroll"]
+                command = [
+                    "ffmpeg",
+                    "-y",
+                    "-ss", f"{clip_start + segment['start'] - preroll:.6f}",  # Input-side seek
+                    # Input-side length too: after -i it would only limit the first output
+                    "-t", f"{segment['duration'] + preroll:.6f}",
+                    "-i", input_path,
+                ]
+                for j, output in enumerate(plan["outputs"]):
+                    part_path = str(parts_dir / f"{j:02d}_{i:04d}.mp3")
+                    command += self._output_args(
+                        plan,
+                        {**output, "codec_args": [
+                            *output["codec_args"], "-reservoir", "0", "-write_xing", "0"
+                        ]},
+                        part_path
+                    )
+                    playlists[j].append(f"file '{part_path}'")
+                    if preroll:
+                        playlists[j].append(f"inpoint {preroll:.6f}")
+                    if i < len(plan["segments"]) - 1:
+                        playlists[j].append(f"outpoint {preroll + segment['duration']:.6f}")
+                commands.append(command)
+
+            # Report the combined position and throughput of all segments
+            segment_progress = [{"out_time": 0.0, "speed": None} for _ in commands]
+
+            def segment_reporter(index: int) -> Optional[ProgressCallback]:
+                if on_progress is None:
+                    return None
+
+                async def report(progress: Dict) -> None:
+                    segment_progress[index] = progress
+                    speeds = [p["speed"] for p in segment_progress if p["speed"]]
+                    await on_progress({
+                        "out_time": sum(p["out_time"] for p in segment_progress),
+                        "speed": sum(speeds) if speeds else None
+                    })
+                return report
+
+            logger.info(f"Encoding {len(commands)} segments of {input_path} in parallel")
+            results = await asyncio.gather(*(
+                self._run(command, segment_reporter(i), lane=lane)
+                for i, command in enumerate(commands)
+            ))
+            for result in results:
+                if result[0] != 0:
+                    return result
+
+            concat_commands = []
+            for j, output_path in enumerate(output_paths):
+                playlist_path = str(parts_dir / f"{j:02d}_playlist.txt")
+                with open(playlist_path, "w") as playlist_file:
+                    playlist_file.write("\n".join(playlists[j]) + "\n")
+                concat_commands.append([
+                    "ffmpeg",
+                    "-y",
+                    "-f", "concat",
+                    "-safe", "0",
+                    "-i", playlist_path,
+                    "-c", "copy",
+                    output_path
+                ])
+
+            results = await asyncio.gather(*(
+                self._run(command, lane=lane) for command in concat_commands
+            ))
+            return next((result for result in results if result[0] != 0), results[0])
+
+        finally:
+            shutil.rmtree(parts_dir, ignore_errors=True)
+
+    async def get_file_info(self, file_path: str, lane: str = "default") -> Tuple[bool, dict, str]:
         """
         Get information about a media file using ffprobe
         Returns: (success, info_dict, error_message)
@@ -115,29 +489,103 @@ class FFmpegWrapper:
 
             command = [
                 "ffprobe",
-                "-v", "quiet",
+                "-v", "error",
                 "-print_format", "json",
                 "-show_format",
                 "-show_streams",
                 file_path
             ]
 
-            result = subprocess.run(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
+            returncode, stdout, stderr = await self._run(command, lane=lane)
 
-            if result.returncode != 0:
-                return False, {}, f"FFprobe error: {result.stderr}"
+            if returncode != 0:
+                return False, {}, describe_error(stderr)
 
-            import json
-            info = json.loads(result.stdout)
+            info = json.loads(stdout)
             return True, info, ""
 
         except Exception as e:
             logger.error(f"Error getting file info: {str(e)}")
             return False, {}, str(e)
 
+    async def probe(self, file_path: str, lane: str = "default") -> Tuple[bool, Dict, str]:
+        """
+        Probe a media file once and summarize its streams
+        Returns: (success, media_info, error_message)
+        """
+        success, info, error = await self.get_file_info(file_path, lane)
+        if not success:
+            return False, {}, error or "Invalid media file format"
+
+        fmt = info.get("format", {})
+        streams = info.get("streams", [])
+        if not fmt or not streams:
+            return False, {}, "Invalid media file format"
+
+        audio_streams = [
+            {
+                "index": stream.get("index"),
+                "codec": stream.get("codec_name"),
+                "bit_rate": _to_int(stream.get("bit_rate")),
+                "sample_rate": _to_int(stream.get("sample_rate")),
+                "channels": stream.get("channels"),
+                "duration": _to_float(stream.get("duration")),
+                "language": stream.get("tags", {}).get("language"),
+                "default": bool(stream.get("disposition", {}).get("default")),
+            }
+            for stream in streams
+            if stream.get("codec_type") == "audio"
+        ]
+
+        media_info = {
+            "format": fmt.get("format_name"),
+            "duration": _to_float(fmt.get("duration")),
+            "bit_rate": _to_int(fmt.get("bit_rate")),
+            "size": _to_int(fmt.get("size")),
+            "video_codecs": [
+                stream.get("codec_name")
+                for stream in streams
+                if stream.get("codec_type") == "video"
+            ],
+            "audio_streams": audio_streams,
+        }
+        return True, media_info, ""
+
+def classify_error(stderr_tail: List[str]) -> str:
+    """Map ffmpeg stderr to a compact error code"""
+    text = "\n".join(stderr_tail)
+    for code, fragments in ERROR_PATTERNS:
+        if any(fragment in text for fragment in fragments):
+            return code
+    return "ffmpeg_failed"
+
+def describe_error(stderr_tail: List[str]) -> str:
+    """Compact 'code: excerpt' message from the last meaningful stderr line"""
+    excerpt = next(
+        (line.strip() for line in reversed(stderr_tail)
+         if line.strip() and line.strip() != "Conversion failed!"),
+        ""
+    )
+    return f"{classify_error(stderr_tail)}: {excerpt[:settings.FFMPEG_ERROR_EXCERPT]}"
+
+def split_error(error: str) -> Tuple[Optional[str], str]:
+    """Split a describe_error message back into (code, excerpt)"""
+    code, sep, excerpt = error.partition(": ")
+    known = {code for code, _ in ERROR_PATTERNS} | {"ffmpeg_failed"}
+    if sep and code in known:
+        return code, excerpt
+    return None, error
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
 ffmpeg = FFmpegWrapper()
\ No newline at end of file
@@ -0,0 +1,49 @@
+import asyncio
+from collections import deque
+from typing import Deque
+
+class ResizableLimiter:
+    """
+    A semaphore whose limit can change while it is in use. Shrinking never
+    interrupts holders; new acquirers wait until usage drops below the limit,
+    and a limit of 0 pauses acquirers entirely.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(0, limit)
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        """Acquirers currently blocked on the limit"""
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    async def acquire(self) -> None:
+        while self.active >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            await waiter
+        self.active += 1
+
+    def release(self) -> None:
+        self.active -= 1
+        self._wake()
+
+    def resize(self, limit: int) -> None:
+        self.limit = max(0, limit)
+        self._wake()
+
+    def _wake(self) -> None:
+        # Waiters re-check the limit, so waking all of them is always safe
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def __aenter__(self) -> "ResizableLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.release()
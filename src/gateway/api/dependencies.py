@@ -1,38 +1,32 @@
 from fastapi import Header, HTTPException
-import httpx
 import logging
+import secrets
 from typing import Dict
 
 from ..core.config import settings
-from ..core.exceptions import AuthServiceError
+from ..services.auth_client import auth_client
+from ..services.jwks import local_verifier
+from ..services.token_cache import token_cache
 
 logger = logging.getLogger(__name__)
 
 async def verify_token(authorization: str = Header(None)) -> Dict:
-    """Verify JWT token with Auth service"""
+    """Verify JWT token locally when possible, otherwise with Auth service"""
     if not authorization:
         raise HTTPException(status_code=401, detail="Authorization header missing")
-    
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{settings.AUTH_SERVICE_URL}/verify",
-                headers={"Authorization": authorization},
-                timeout=settings.AUTH_TIMEOUT
-            )
-            
-            response.raise_for_status()
-            return response.json()
-            
-    except httpx.TimeoutException:
-        logger.error("Auth service timeout")
-        raise AuthServiceError("Auth service timeout")
-    except httpx.HTTPStatusError as e:
-        logger.error(f"Auth service error: {str(e)}")
-        raise HTTPException(
-            status_code=e.response.status_code,
-            detail="Invalid token"
-        )
-    except Exception as e:
-        logger.error(f"Unexpected error in auth verification: {str(e)}")
-        raise AuthServiceError()
\ No newline at end of file
+
+    if settings.AUTH_LOCAL_VERIFY:
+        user = await local_verifier.verify(authorization)
+        if user is not None:
+            return user
+
+    if settings.TOKEN_CACHE_ENABLED:
+        return await token_cache.get(authorization, auth_client.verify)
+    return await auth_client.verify(authorization)
+
+async def verify_internal(x_internal_token: str = Header(None)) -> None:
+    """Only other services holding INTERNAL_API_TOKEN may call internal routes"""
+    if not settings.INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_internal_token or not secrets.compare_digest(x_internal_token, settings.INTERNAL_API_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid internal token")
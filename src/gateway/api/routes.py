@@ -1,43 +1,134 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, BackgroundTasks
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, BackgroundTasks, Request, Body
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+import json
 import logging
 from datetime import datetime
-import motor.motor_asyncio
 import os
+from typing import List, Optional, Tuple
 
 from ..services.file_handler import file_handler
 from ..services.queue import queue_service
-from .dependencies import verify_token
-from ..core.exceptions import FileUploadError
+from ..services.streaming import stream_service
+from ..services.relay import relay_service, RelayError
+from ..services.storage import storage
+from ..services.jobs import job_repository, status_view
+from ..services.status_events import status_broadcaster
+from ..services.token_cache import token_cache
+import uuid
+from .dependencies import verify_token, verify_internal
+from ..core.exceptions import InvalidProfileError, InvalidClipRangeError
 from ..core.config import settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+MEDIA_TYPES = {
+    ".mp3": "audio/mpeg",
+    ".m4a": "audio/mp4",
+    ".opus": "audio/ogg",
+}
+
+def parse_profiles(profiles: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma-separated list of output profiles"""
+    if not profiles:
+        return None
+    names = list(dict.fromkeys(p.strip() for p in profiles.split(",") if p.strip()))
+    unknown = [name for name in names if name not in settings.OUTPUT_PROFILES]
+    if unknown:
+        raise InvalidProfileError(
+            f"Unknown output profiles: {unknown}. Allowed: {sorted(settings.OUTPUT_PROFILES)}"
+        )
+    if len(names) > settings.MAX_PROFILES_PER_JOB:
+        raise InvalidProfileError(
+            f"At most {settings.MAX_PROFILES_PER_JOB} output profiles per job"
+        )
+    return names or None
+
+def clip_duration(
+    duration: Optional[float],
+    start: Optional[float],
+    end: Optional[float]
+) -> Optional[float]:
+    """Length of media the job will actually convert, for lane routing"""
+    if duration is None:
+        return end - (start or 0) if end is not None else None
+    if end is not None:
+        duration = min(end, duration)
+    return max(duration - (start or 0), 0)
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single 'bytes=start-end' Range header into an inclusive byte range"""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start, end = int(first), int(last) if last else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start, end = max(size - int(last), 0), size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, min(end, size - 1)
+
+def validate_clip(start: Optional[float], end: Optional[float]) -> None:
+    """Validate an optional start/end range in seconds"""
+    if start is not None and start < 0:
+        raise InvalidClipRangeError("Clip start must not be negative")
+    if end is not None and end <= (start or 0):
+        raise InvalidClipRangeError()
+
 @router.post("/convert")
 async def convert_video(
     file: UploadFile = File(...),
+    profiles: Optional[str] = Form(None),
+    start: Optional[float] = Form(None),
+    end: Optional[float] = Form(None),
     background_tasks: BackgroundTasks = BackgroundTasks(),
     user_data: dict = Depends(verify_token)
 ):
     """
     Convert video file to MP3
-    - Validates file
+    - Validates file and requested output profiles (comma-separated)
+    - Optionally converts only the start/end range (seconds)
     - Stores file temporarily
     - Queues conversion job
     """
     try:
         # Validate file
         file_handler.validate_file(file)
+        profile_names = parse_profiles(profiles)
+        validate_clip(start, end)
         
+        # Read the duration from the container header, before it's consumed
+        head = await file.read(settings.STREAM_SNIFF_BYTES)
+        await file.seek(0)
+        duration = file_handler.read_duration(file.filename, head)
+
         # Save file and get job ID
-        job_id, file_path = await file_handler.save_file(file)
+        job_id, input_key, content_hash = await file_handler.save_file(file)
+        if duration is None:
+            duration = await file_handler.probe_duration(storage.local_path(input_key))
         
         # Queue conversion task
         await queue_service.publish_conversion_task(
             job_id=job_id,
-            file_path=file_path,
-            user_email=user_data["email"]
+            file_path=storage.local_path(input_key),
+            user_email=user_data["email"],
+            tier=user_data.get("tier"),
+            content_hash=content_hash,
+            profiles=profile_names,
+            start=start,
+            end=end,
+            input_key=input_key,
+            duration=clip_duration(duration, start, end)
         )
         
         return JSONResponse(
@@ -50,8 +141,8 @@ async def convert_video(
             }
         )
         
-    except FileUploadError as e:
-        raise e
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing conversion request: {str(e)}")
         raise HTTPException(
@@ -59,6 +150,114 @@ async def convert_video(
             detail="Error processing conversion request"
         )
 
+@router.post("/convert/stream")
+async def convert_video_stream(
+    request: Request,
+    filename: str,
+    profiles: Optional[str] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    user_data: dict = Depends(verify_token)
+):
+    """
+    Convert a video sent as the raw request body
+    - Streamable containers (MKV/WebM, MPEG-TS, MP4 with the index first)
+      are relayed into the converter's FFmpeg as they arrive
+    - Anything else is spooled to storage like /convert
+    """
+    try:
+        file_handler.validate_filename(filename)
+        profile_names = parse_profiles(profiles)
+        validate_clip(start, end)
+
+        job_id = str(uuid.uuid4())
+        chunks = request.stream().__aiter__()
+        head = await file_handler.read_head(chunks, settings.STREAM_SNIFF_BYTES)
+        duration = file_handler.read_duration(filename, head)
+
+        if file_handler.is_streamable(filename, head):
+            relay = relay_service.open(job_id)
+            await queue_service.publish_conversion_task(
+                job_id=job_id,
+                file_path=None,
+                user_email=user_data["email"],
+                tier=user_data.get("tier"),
+                profiles=profile_names,
+                start=start,
+                end=end,
+                input_url=relay_service.url(relay),
+                duration=clip_duration(duration, start, end)
+            )
+            mode = await relay_service.feed(relay, head, chunks)
+        else:
+            async def body():
+                yield head
+                async for chunk in chunks:
+                    yield chunk
+
+            input_key, content_hash = await file_handler.save_stream(job_id, filename, body())
+            if duration is None:
+                duration = await file_handler.probe_duration(storage.local_path(input_key))
+            await queue_service.publish_conversion_task(
+                job_id=job_id,
+                file_path=storage.local_path(input_key),
+                user_email=user_data["email"],
+                tier=user_data.get("tier"),
+                content_hash=content_hash,
+                profiles=profile_names,
+                start=start,
+                end=end,
+                input_key=input_key,
+                duration=clip_duration(duration, start, end)
+            )
+            mode = "spooled"
+
+        return JSONResponse(
+            status_code=202,
+            content={
+                "message": "Video conversion started",
+                "job_id": job_id,
+                "status": "processing",
+                "input_mode": mode,
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        )
+
+    except HTTPException:
+        raise
+    except RelayError as e:
+        logger.error(f"Relay for streamed upload failed: {str(e)}")
+        raise HTTPException(status_code=502, detail="Conversion stream interrupted")
+    except Exception as e:
+        logger.error(f"Error processing streamed conversion request: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Error processing conversion request"
+        )
+
+@router.get("/relay/{job_id}", include_in_schema=False)
+async def relay_upload(job_id: str, token: str):
+    """Internal: the converter pulls a streamed upload from here"""
+    chunks = await relay_service.attach(job_id, token)
+    if chunks is None:
+        raise HTTPException(status_code=404, detail="Relay not found")
+    return StreamingResponse(chunks, media_type="application/octet-stream")
+
+@router.post("/internal/tokens/revoke", include_in_schema=False, dependencies=[Depends(verify_internal)])
+async def revoke_tokens(
+    user_id: Optional[str] = Body(None, embed=True),
+    token: Optional[str] = Body(None, embed=True)
+):
+    """Internal: the auth service drops a revoked user's or token's cached verifications"""
+    if not user_id and not token:
+        raise HTTPException(status_code=400, detail="user_id or token required")
+    invalidated = 0
+    if user_id:
+        invalidated += token_cache.invalidate_user(user_id)
+    if token:
+        invalidated += token_cache.invalidate_token(f"Bearer {token}")
+    return {"invalidated": invalidated}
+
 @router.get("/status/{job_id}")
 async def get_conversion_status(
     job_id: str,
@@ -66,54 +265,116 @@ async def get_conversion_status(
 ):
     """Get conversion job status from MongoDB"""
     try:
-        # Connect to MongoDB
-        client = motor.motor_asyncio.AsyncIOMotorClient(settings.MONGODB_URL)
-        db = client[settings.MONGODB_DB]
-        collection = db[settings.MONGODB_COLLECTION]
-
-        # Get job status
-        job = await collection.find_one({"job_id": job_id})
+        job = await job_repository.get_status(job_id)
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
 
-        return {
-            "job_id": job_id,
-            "status": job.get("status", "processing"),
-            "output_path": job.get("output_path"),
-            "timestamp": job.get("updated_at", datetime.utcnow()).isoformat()
-        }
+        return status_view(job_id, job)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting job status: {str(e)}")
         raise HTTPException(status_code=500, detail="Error getting job status")
 
+@router.get("/status/{job_id}/events")
+async def stream_conversion_status(
+    job_id: str,
+    user_data: dict = Depends(verify_token)
+):
+    """
+    Push status changes as server-sent events ("status" events carrying the
+    same body as GET /status) until the job completes or fails
+    """
+    if status_broadcaster.count >= settings.STATUS_MAX_SUBSCRIBERS:
+        raise HTTPException(status_code=503, detail="Too many status streams, poll /status instead")
+    try:
+        subscriber = await status_broadcaster.subscribe(job_id)
+    except Exception as e:
+        logger.error(f"Error subscribing to job status: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error getting job status")
+    if subscriber is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                state = await subscriber.next(settings.STATUS_HEARTBEAT_INTERVAL)
+                if state is None:
+                    # Keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: status\ndata: {json.dumps(state, default=str)}\n\n"
+                if state["status"] in ("completed", "failed"):
+                    return
+        finally:
+            status_broadcaster.unsubscribe(subscriber)
+
+    async def release():
+        # Also runs when the client left before the stream started
+        status_broadcaster.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(release)
+    )
+
 @router.get("/download/{job_id}")
 async def download_file(
     job_id: str,
+    request: Request,
+    profile: Optional[str] = None,
     user_data: dict = Depends(verify_token)
 ):
-    """Download converted MP3 file"""
+    """Download converted file, optionally for a specific output profile; supports Range"""
     try:
         # Get job status to verify completion and get output path
-        client = motor.motor_asyncio.AsyncIOMotorClient(settings.MONGODB_URL)
-        db = client[settings.MONGODB_DB]
-        collection = db[settings.MONGODB_COLLECTION]
-
-        job = await collection.find_one({"job_id": job_id})
+        job = await job_repository.get_download(job_id)
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
         
         if job.get("status") != "completed":
             raise HTTPException(status_code=400, detail="Conversion not completed")
 
-        output_path = job.get("output_path")
-        if not output_path or not os.path.exists(output_path):
-            raise HTTPException(status_code=404, detail="File not found")
+        output = {"key": job.get("output_key"), "path": job.get("output_path")}
+        if profile:
+            output = next(
+                (o for o in job.get("outputs", []) if o.get("profile") == profile),
+                {}
+            )
+        key, output_path = output.get("key"), output.get("path")
+        size = await storage.size(key) if key else None
+        if size is None:
+            # Jobs converted before outputs moved to storage only have a path
+            if not output_path or not os.path.exists(output_path):
+                raise HTTPException(status_code=404, detail="File not found")
+
+        extension = os.path.splitext(key or output_path)[1].lower()
+        media_type = MEDIA_TYPES.get(extension, "application/octet-stream")
+        filename = f"{job_id}_{profile}{extension}" if profile else f"{job_id}{extension}"
+        if size is None:
+            return FileResponse(output_path, media_type=media_type, filename=filename)
 
-        return FileResponse(
-            output_path,
-            media_type='audio/mpeg',
-            filename=f"{job_id}.mp3"
+        headers = {
+            "Accept-Ranges": "bytes",
+            "Content-Disposition": f'attachment; filename="{filename}"'
+        }
+        byte_range = parse_range(request.headers.get("range"), size)
+        if byte_range is None:
+            headers["Content-Length"] = str(size)
+            return StreamingResponse(storage.read(key), media_type=media_type, headers=headers)
+
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            storage.read(key, start, end),
+            status_code=206,
+            media_type=media_type,
+            headers=headers
         )
 
     except HTTPException:
@@ -123,6 +384,45 @@ async def download_file(
         raise HTTPException(status_code=500, detail="Error downloading file")
     
 
+@router.get("/stream/{job_id}")
+async def stream_file(
+    job_id: str,
+    user_data: dict = Depends(verify_token)
+):
+    """
+    Stream the primary output with chunked transfer encoding while the
+    conversion is still running; finished jobs stream the final file
+    """
+    try:
+        job = await stream_service.wait_for_output(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="No output available to stream yet")
+        if job.get("status") == "failed":
+            raise HTTPException(status_code=400, detail="Conversion failed")
+
+        if job.get("status") == "completed" and job.get("output_key"):
+            key = job["output_key"]
+            extension = os.path.splitext(key)[1].lower()
+            return StreamingResponse(
+                storage.read(key),
+                media_type=MEDIA_TYPES.get(extension, "application/octet-stream")
+            )
+
+        path = job.get("output_path") if job.get("status") == "completed" else job.get("stream_path")
+        if not path or not os.path.exists(path):
+            raise HTTPException(status_code=404, detail="File not found")
+
+        extension = os.path.splitext(path)[1].lower()
+        return StreamingResponse(
+            stream_service.tail(job_id, path),
+            media_type=MEDIA_TYPES.get(extension, "application/octet-stream")
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error streaming file: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error streaming file")
 
 @router.get("/health")
 async def health_check():
@@ -130,5 +430,6 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
-        "service": "gateway"
+        "service": "gateway",
+        "auth_cache": token_cache.stats()
     }
\ No newline at end of file
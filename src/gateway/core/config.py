@@ -17,19 +17,85 @@ class Settings(BaseSettings):
     # Queue Names
     VIDEO_PROCESSING_QUEUE: str = "video_processing"
     NOTIFICATION_QUEUE: str = "notifications"
+
+    # Duration lanes: jobs up to SHORT_JOB_MAX_DURATION seconds go to
+    # "<queue>.short", longer ones to "<queue>.long" and jobs of unknown
+    # duration to the plain queue, so short clips don't wait behind long videos
+    JOB_LANES_ENABLED: bool = os.getenv("JOB_LANES_ENABLED", "true").lower() == "true"
+    SHORT_JOB_MAX_DURATION: int = int(os.getenv("SHORT_JOB_MAX_DURATION", 600))
+    PROBE_TIMEOUT: int = 10  # seconds for the ffprobe fallback
     
     # File Upload Settings
     UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "/tmp/uploads")
+    OUTPUT_DIR: str = os.getenv("OUTPUT_DIR", "/tmp/converted")
     MAX_UPLOAD_SIZE: int = 100 * 1024 * 1024  # 100MB
-    ALLOWED_EXTENSIONS: Set[str] = {".mp4", ".avi", ".mkv", ".mov"}
+    ALLOWED_EXTENSIONS: Set[str] = {".mp4", ".avi", ".mkv", ".mov", ".webm", ".ts"}
+
+    # Blob storage shared with the converter: "local" uses the directories
+    # above, "http" an S3-style object store at STORAGE_URL
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "local")
+    STORAGE_URL: str = os.getenv("STORAGE_URL", "http://localhost:9000/media")
+    STORAGE_TOKEN: str = os.getenv("STORAGE_TOKEN", "")
+    STORAGE_PART_SIZE: int = 8 * 1024 * 1024  # bytes per multipart upload part
+    STORAGE_TIMEOUT: int = 60  # seconds
+
+    # Streaming uploads relayed straight into the converter's FFmpeg
+    # GATEWAY_INTERNAL_URL must reach this gateway instance, not a load balancer
+    GATEWAY_INTERNAL_URL: str = os.getenv("GATEWAY_INTERNAL_URL", "http://localhost:8000")
+    STREAM_SNIFF_BYTES: int = 256 * 1024  # bytes inspected to detect streamable containers
+    RELAY_BUFFER_CHUNKS: int = 16
+    RELAY_CONNECT_TIMEOUT: int = 30  # seconds to wait for a converter before spooling
+    RELAY_STALL_TIMEOUT: int = 120  # seconds either side may stop moving data
+    RELAY_SPOOL_TTL: int = 3600  # seconds a spooled, unclaimed upload is kept
+
+    # Output profiles a job may request (defined in the converter service)
+    OUTPUT_PROFILES: Set[str] = {"mp3_128", "mp3_192", "mp3_320", "mp3_v0", "mp3_v2", "opus_96", "aac_192"}
+    MAX_PROFILES_PER_JOB: int = 4
+
+    # Progressive streaming of outputs that are still being converted
+    STREAM_CHUNK_SIZE: int = 64 * 1024
+    STREAM_POLL_INTERVAL: float = 0.5  # seconds
+    STREAM_WAIT_TIMEOUT: int = 30  # seconds to wait for a job to start writing
+
+    # Pushed job status (server-sent events), fed by one MongoDB change stream
+    # per process, or by polling the subscribed jobs when there is no replica set
+    STATUS_HEARTBEAT_INTERVAL: int = 15  # seconds between keep-alive comments
+    STATUS_POLL_INTERVAL: float = 1.0  # seconds, polling fallback
+    STATUS_MAX_SUBSCRIBERS: int = 10000  # open status streams per process
 
     # MongoDB Configuration
     MONGODB_URL: str = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
     MONGODB_DB: str = os.getenv("MONGODB_DB", "converter_db")
     MONGODB_COLLECTION: str = os.getenv("MONGODB_COLLECTION", "conversions")
+    MONGODB_MAX_POOL_SIZE: int = int(os.getenv("MONGODB_MAX_POOL_SIZE", 50))
+    MONGODB_TIMEOUT: int = 5  # seconds to find a server before a lookup fails
     
     # Service Timeouts
     AUTH_TIMEOUT: int = 5  # seconds
+
+    # Pooled client for the auth service. HTTP/2 also needs the h2 package and
+    # an https AUTH_SERVICE_URL (httpx negotiates it via TLS ALPN)
+    AUTH_MAX_CONNECTIONS: int = 100
+    AUTH_MAX_KEEPALIVE: int = 20
+    AUTH_KEEPALIVE_EXPIRY: float = 30.0  # seconds an idle connection is kept
+    AUTH_HTTP2: bool = os.getenv("AUTH_HTTP2", "false").lower() == "true"
+    # Circuit breaker: fail fast for AUTH_BREAKER_RESET seconds after
+    # AUTH_BREAKER_THRESHOLD consecutive timeouts, connection errors or 5xx
+    AUTH_BREAKER_THRESHOLD: int = 5
+    AUTH_BREAKER_RESET: float = 30.0  # seconds
+    # Verify RS256 tokens locally against the auth service's published keys;
+    # legacy HS256 tokens and unknown keys still go to the auth service
+    AUTH_LOCAL_VERIFY: bool = os.getenv("AUTH_LOCAL_VERIFY", "true").lower() == "true"
+    JWKS_CACHE_TTL: int = 300  # seconds before keys are refetched
+    JWKS_MIN_REFRESH_INTERVAL: int = 30  # seconds between refetches for unknown kids
+    # Verified tokens are cached per process until their exp or for at most
+    # TOKEN_CACHE_TTL seconds (the longest a revoked user can keep access)
+    TOKEN_CACHE_ENABLED: bool = os.getenv("TOKEN_CACHE_ENABLED", "true").lower() == "true"
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL: float = float(os.getenv("TOKEN_CACHE_TTL", 60))
+    # Shared secret the auth service sends in X-Internal-Token to drop a revoked
+    # user's or token's cache entries in this process; empty disables the route
+    INTERNAL_API_TOKEN: str = os.getenv("INTERNAL_API_TOKEN", "")
     QUEUE_TIMEOUT: int = 10  # seconds
 
     class Config:
@@ -16,6 +16,20 @@ class InvalidFileTypeError(FileUploadError):
     def __init__(self, allowed_types: set):
         super().__init__(f"Invalid file type. Allowed types: {allowed_types}")
 
+class InvalidProfileError(HTTPException):
+    def __init__(self, detail: str):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=detail
+        )
+
+class InvalidClipRangeError(HTTPException):
+    def __init__(self, detail: str = "Clip end must be after clip start"):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=detail
+        )
+
 class FileStorageError(HTTPException):
     def __init__(self):
         super().__init__(
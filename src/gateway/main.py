@@ -7,6 +7,11 @@ from contextlib import asynccontextmanager
 from .api.routes import router
 from .core.config import settings
 from .services.queue import queue_service
+from .services.storage import storage
+from .services.auth_client import auth_client
+from .services.jwks import local_verifier
+from .services.jobs import job_repository
+from .services.status_events import status_broadcaster
 
 def ensure_directories():
     """Ensure required directories exist with proper permissions"""
@@ -24,7 +29,11 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     # Startup
     try:
+        await auth_client.start()
+        if settings.AUTH_LOCAL_VERIFY:
+            await local_verifier.refresh()
         await queue_service.connect()
+        await job_repository.connect()
         logger.info("Gateway service started successfully")
     except Exception as e:
         logger.error(f"Failed to initialize gateway service: {str(e)}")
@@ -35,6 +44,10 @@ async def lifespan(app: FastAPI):
     # Shutdown
     try:
         await queue_service.close()
+        await storage.close()
+        await auth_client.close()
+        await status_broadcaster.close()
+        await job_repository.close()
         logger.info("Gateway service shut down successfully")
     except Exception as e:
         logger.error(f"Error during shutdown: {str(e)}")
@@ -0,0 +1,129 @@
+import logging
+import time
+from typing import Dict, Optional
+
+import httpx
+from fastapi import HTTPException
+
+from ..core.config import settings
+from ..core.exceptions import AuthServiceError
+
+logger = logging.getLogger(__name__)
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+class AuthClient:
+    """
+    One pooled, keep-alive HTTP client for the auth service, shared by all
+    requests, with a small circuit breaker: after AUTH_BREAKER_THRESHOLD
+    consecutive failures calls fail fast for AUTH_BREAKER_RESET seconds, then
+    a single trial call decides whether the circuit closes again.
+    """
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    async def start(self) -> None:
+        http2 = settings.AUTH_HTTP2 and _http2_available()
+        if settings.AUTH_HTTP2 and not http2:
+            logger.warning("AUTH_HTTP2 is set but the h2 package is not installed; using HTTP/1.1")
+        self._client = httpx.AsyncClient(
+            base_url=settings.AUTH_SERVICE_URL,
+            timeout=settings.AUTH_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.AUTH_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.AUTH_MAX_KEEPALIVE,
+                keepalive_expiry=settings.AUTH_KEEPALIVE_EXPIRY
+            ),
+            http2=http2
+        )
+        logger.info(f"Auth client started (http2={http2})")
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise AuthServiceError("Auth client not started")
+        return self._client
+
+    async def verify(self, authorization: str) -> Dict:
+        """Verify a bearer token with the auth service; returns the user"""
+        self._before_call()
+        try:
+            response = await self.client.post("/verify", headers={"Authorization": authorization})
+        except httpx.TimeoutException:
+            self._record_failure()
+            logger.error("Auth service timeout")
+            raise AuthServiceError("Auth service timeout")
+        except httpx.HTTPError as e:
+            self._record_failure()
+            logger.error(f"Auth service unreachable: {str(e)}")
+            raise AuthServiceError()
+
+        if response.status_code >= 500:
+            self._record_failure()
+            logger.error(f"Auth service error: HTTP {response.status_code}")
+            raise AuthServiceError()
+
+        # A rejected token still means the service is healthy
+        self._record_success()
+        if response.status_code >= 400:
+            raise HTTPException(status_code=response.status_code, detail="Invalid token")
+        return response.json()
+
+    async def fetch_jwks(self) -> Dict:
+        """The auth service's published token signing keys"""
+        self._before_call()
+        try:
+            response = await self.client.get("/.well-known/jwks.json")
+        except httpx.HTTPError as e:
+            self._record_failure()
+            logger.error(f"Failed to fetch auth signing keys: {str(e)}")
+            raise AuthServiceError()
+
+        if response.status_code >= 500:
+            self._record_failure()
+        else:
+            self._record_success()
+        if response.status_code != 200:
+            logger.error(f"Failed to fetch auth signing keys: HTTP {response.status_code}")
+            raise AuthServiceError()
+        return response.json()
+
+    def _before_call(self) -> None:
+        if self.opened_at is None:
+            return
+        now = time.monotonic()
+        if now - self.opened_at < settings.AUTH_BREAKER_RESET:
+            raise AuthServiceError("Auth service unavailable")
+        # Half-open: this call is the trial; others keep failing fast meanwhile
+        self.opened_at = now
+
+    def _record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info("Auth service recovered, closing circuit")
+        self.failures = 0
+        self.opened_at = None
+
+    def _record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= settings.AUTH_BREAKER_THRESHOLD:
+            if self.opened_at is None:
+                logger.warning(
+                    f"Opening auth circuit for {settings.AUTH_BREAKER_RESET}s "
+                    f"after {self.failures} failures"
+                )
+            self.opened_at = time.monotonic()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+auth_client = AuthClient()
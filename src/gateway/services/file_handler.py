@@ -1,11 +1,15 @@
 import os
-import aiofiles
+import asyncio
+import hashlib
+import json
+import shutil
 from fastapi import UploadFile
 from datetime import datetime
 import uuid
 from pathlib import Path
 import logging
-from typing import Tuple
+import struct
+from typing import AsyncIterator, Optional, Tuple
 
 from ..core.config import settings
 from ..core.exceptions import (
@@ -13,44 +17,152 @@ from ..core.exceptions import (
     InvalidFileTypeError,
     FileStorageError
 )
+from .storage import storage
 
 logger = logging.getLogger(__name__)
 
+# Matroska/WebM element IDs on the path to the segment duration
+EBML_SEGMENT = 0x18538067
+EBML_INFO = 0x1549A966
+EBML_TIMECODE_SCALE = 0x2AD7B1
+EBML_DURATION = 0x4489
+
 class FileHandler:
     def __init__(self):
         os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
         
     def validate_file(self, file: UploadFile) -> None:
         """Validate file type and size"""
+        self.validate_filename(file.filename)
+
+    def validate_filename(self, filename: str) -> None:
+        """Validate file type from its extension"""
         # Check file extension
-        extension = Path(file.filename).suffix.lower()
+        extension = Path(filename).suffix.lower()
         if extension not in settings.ALLOWED_EXTENSIONS:
             raise InvalidFileTypeError(settings.ALLOWED_EXTENSIONS)
 
-    async def save_file(self, file: UploadFile) -> Tuple[str, str]:
+    async def save_file(self, file: UploadFile) -> Tuple[str, str, str]:
+        """
+        Save uploaded file and return job_id, storage key and content hash
+        Returns: Tuple[job_id, storage_key, sha256_hex]
+        """
+        async def chunks() -> AsyncIterator[bytes]:
+            while chunk := await file.read(1024 * 1024):  # 1MB chunks
+                yield chunk
+
+        # Generate unique job ID
+        job_id = str(uuid.uuid4())
+        key, content_hash = await self.save_stream(job_id, file.filename, chunks())
+        return job_id, key, content_hash
+
+    async def save_stream(
+        self,
+        job_id: str,
+        filename: str,
+        chunks: AsyncIterator[bytes]
+    ) -> Tuple[str, str]:
         """
-        Save uploaded file and return job_id and file path
-        Returns: Tuple[job_id, file_path]
+        Spool a stream of upload chunks to storage
+        Returns: Tuple[storage_key, sha256_hex]
         """
         try:
-            # Generate unique job ID and filename
-            job_id = str(uuid.uuid4())
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            safe_filename = f"{timestamp}_{job_id}_{file.filename}"
-            file_path = os.path.join(settings.UPLOAD_DIR, safe_filename)
+            safe_filename = f"{timestamp}_{job_id}_{os.path.basename(filename)}"
+            key = f"uploads/{safe_filename}"
 
-            # Save file in chunks
-            async with aiofiles.open(file_path, 'wb') as out_file:
-                while chunk := await file.read(1024 * 1024):  # 1MB chunks
-                    await out_file.write(chunk)
+            # Save file in chunks, hashing as we go for the conversion cache
+            digest = hashlib.sha256()
 
-            logger.info(f"File saved: {file_path}")
-            return job_id, file_path
+            async def hashed() -> AsyncIterator[bytes]:
+                async for chunk in chunks:
+                    digest.update(chunk)
+                    yield chunk
+
+            await storage.save(key, hashed())
+            logger.info(f"File saved: {key}")
+            return key, digest.hexdigest()
 
         except Exception as e:
             logger.error(f"Error saving file: {str(e)}")
             raise FileStorageError()
 
+    async def read_head(self, chunks: AsyncIterator[bytes], size: int) -> bytes:
+        """Buffer at least `size` bytes (or the whole stream) from the front of an upload"""
+        head = b""
+        while len(head) < size:
+            try:
+                head += await chunks.__anext__()
+            except StopAsyncIteration:
+                break
+        return head
+
+    def is_streamable(self, filename: str, head: bytes) -> bool:
+        """
+        Whether FFmpeg can decode the container from a pipe, without seeking.
+        Matroska/WebM and MPEG-TS always can; MP4/MOV only when the index
+        (moov, or moof for fragmented files) comes before the media data.
+        """
+        extension = Path(filename).suffix.lower()
+        if extension in (".mkv", ".webm"):
+            return head[:4] == b"\x1a\x45\xdf\xa3"
+        if extension == ".ts":
+            return len(head) > 188 and head[0] == head[188] == 0x47
+        if extension in (".mp4", ".mov"):
+            offset = 0
+            while offset + 8 <= len(head):
+                box_size, box_type = struct.unpack(">I4s", head[offset:offset + 8])
+                if box_type in (b"moov", b"moof"):
+                    return True
+                if box_type == b"mdat":
+                    return False
+                if box_size == 1 and offset + 16 <= len(head):
+                    box_size = struct.unpack(">Q", head[offset + 8:offset + 16])[0]
+                if box_size < 8:
+                    return False
+                offset += box_size
+        return False
+
+    def read_duration(self, filename: str, head: bytes) -> Optional[float]:
+        """
+        Container duration in seconds from the first bytes of an upload:
+        MP4/MOV mvhd (only when moov comes first) or the Matroska segment info
+        """
+        extension = Path(filename).suffix.lower()
+        try:
+            if extension in (".mp4", ".mov"):
+                return _mp4_duration(head)
+            if extension in (".mkv", ".webm"):
+                return _matroska_duration(head)
+        except (struct.error, IndexError, ValueError):
+            pass
+        return None
+
+    async def probe_duration(self, file_path: Optional[str]) -> Optional[float]:
+        """Duration from a quick ffprobe of a saved upload, if ffprobe is available"""
+        ffprobe = shutil.which("ffprobe")
+        if not ffprobe or not file_path or not os.path.exists(file_path):
+            return None
+        try:
+            process = await asyncio.create_subprocess_exec(
+                ffprobe, "-v", "error", "-show_entries", "format=duration",
+                "-of", "json", file_path,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            try:
+                stdout, _ = await asyncio.wait_for(process.communicate(), settings.PROBE_TIMEOUT)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                logger.warning(f"ffprobe timed out on {file_path}")
+                return None
+            duration = json.loads(stdout or b"{}").get("format", {}).get("duration")
+            return float(duration) if duration else None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not probe duration of {file_path}: {str(e)}")
+            return None
+
     async def cleanup_file(self, file_path: str) -> None:
         """Remove temporary file"""
         try:
@@ -74,4 +186,75 @@ class FileHandler:
             "path": file_path,
         }
 
+def _mp4_duration(head: bytes) -> Optional[float]:
+    """Read timescale and duration from moov/mvhd"""
+    offset, end = 0, len(head)
+    while offset + 8 <= end:
+        box_size, box_type = struct.unpack(">I4s", head[offset:offset + 8])
+        header = 8
+        if box_size == 1:
+            box_size = struct.unpack(">Q", head[offset + 8:offset + 16])[0]
+            header = 16
+        elif box_size == 0:
+            box_size = end - offset
+        if box_size < header:
+            return None
+
+        if box_type == b"moov":
+            # Descend: mvhd is a direct child of moov
+            end = min(end, offset + box_size)
+            offset += header
+            continue
+        if box_type == b"mvhd":
+            body = head[offset + header:]
+            if body[0] == 1:
+                timescale, duration = struct.unpack(">IQ", body[20:32])
+            else:
+                timescale, duration = struct.unpack(">II", body[12:20])
+            return duration / timescale if timescale else None
+        if box_type == b"mdat":
+            return None
+        offset += box_size
+    return None
+
+def _matroska_duration(head: bytes) -> Optional[float]:
+    """Read TimecodeScale and Duration from Segment/Info"""
+    offset = 0
+    info_end = None
+    scale, duration = 1000000, None
+    while offset < len(head):
+        if info_end is not None and offset >= info_end:
+            break
+        element_id, id_length = _ebml_vint(head, offset, keep_marker=True)
+        size, size_length = _ebml_vint(head, offset + id_length, keep_marker=False)
+        if not id_length or not size_length:
+            return None
+        offset += id_length + size_length
+
+        if element_id == EBML_SEGMENT:
+            continue  # Descend into the segment's children
+        if element_id == EBML_INFO:
+            info_end = offset + size
+            continue
+        if element_id == EBML_TIMECODE_SCALE:
+            scale = int.from_bytes(head[offset:offset + size], "big")
+        elif element_id == EBML_DURATION:
+            duration = struct.unpack(">f" if size == 4 else ">d", head[offset:offset + size])[0]
+        offset += size
+
+    return duration * scale / 1e9 if duration else None
+
+def _ebml_vint(data: bytes, offset: int, keep_marker: bool) -> Tuple[int, int]:
+    """Decode an EBML variable-length integer; returns (value, length), length 0 on error"""
+    if offset >= len(data) or data[offset] == 0:
+        return 0, 0
+    first = data[offset]
+    length = 9 - first.bit_length()
+    if offset + length > len(data):
+        return 0, 0
+    value = first if keep_marker else first & ((1 << (8 - length)) - 1)
+    for byte in data[offset + 1:offset + length]:
+        value = (value << 8) | byte
+    return value, length
+
 file_handler = FileHandler()
\ No newline at end of file
@@ -0,0 +1,88 @@
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+
+import motor.motor_asyncio
+import pymongo
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Fields each kind of lookup reads, so no route pulls whole job documents
+STATUS_FIELDS = {
+    "_id": 0, "status": 1, "progress": 1, "eta_seconds": 1, "error": 1,
+    "error_code": 1, "output_path": 1, "media": 1, "updated_at": 1,
+    **{f"outputs.{field}": 1 for field in ("profile", "format", "mode", "size", "bitrate", "bytes_saved")}
+}
+DOWNLOAD_FIELDS = {
+    "_id": 0, "status": 1, "output_key": 1, "output_path": 1,
+    "outputs.profile": 1, "outputs.key": 1, "outputs.path": 1
+}
+STREAM_FIELDS = {"_id": 0, "status": 1, "stream_path": 1, "output_path": 1, "output_key": 1}
+
+def status_view(job_id: str, job: Dict) -> Dict:
+    """Public status of a job as returned by the status routes"""
+    return {
+        "job_id": job_id,
+        "status": job.get("status", "processing"),
+        "progress": job.get("progress"),
+        "eta_seconds": job.get("eta_seconds"),
+        "error": job.get("error"),
+        "error_code": job.get("error_code"),
+        "output_path": job.get("output_path"),
+        "outputs": [
+            {key: output.get(key) for key in ("profile", "format", "mode", "size", "bitrate", "bytes_saved")}
+            for output in job.get("outputs", [])
+        ],
+        "media": job.get("media"),
+        "timestamp": (job.get("updated_at") or datetime.utcnow()).isoformat()
+    }
+
+class JobRepository:
+    """Read access to conversion jobs through one MongoDB client per process"""
+
+    def __init__(self):
+        self.client: Optional[motor.motor_asyncio.AsyncIOMotorClient] = None
+        self._collection = None
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            self.client = motor.motor_asyncio.AsyncIOMotorClient(
+                settings.MONGODB_URL,
+                maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+                serverSelectionTimeoutMS=settings.MONGODB_TIMEOUT * 1000
+            )
+            self._collection = self.client[settings.MONGODB_DB][settings.MONGODB_COLLECTION]
+        return self._collection
+
+    async def connect(self) -> None:
+        """Create the client and the indexes lookups depend on"""
+        try:
+            await self.collection.create_index("job_id", unique=True)
+        except pymongo.errors.OperationFailure as e:
+            # Existing duplicate job_ids; lookups still use a plain index
+            logger.error(f"Could not create unique job_id index: {str(e)}")
+            await self.collection.create_index("job_id")
+        logger.info("Connected to MongoDB")
+
+    async def get(self, job_id: str, fields: Dict[str, int]) -> Optional[Dict]:
+        return await self.collection.find_one({"job_id": job_id}, fields)
+
+    async def get_status(self, job_id: str) -> Optional[Dict]:
+        return await self.get(job_id, STATUS_FIELDS)
+
+    async def get_download(self, job_id: str) -> Optional[Dict]:
+        return await self.get(job_id, DOWNLOAD_FIELDS)
+
+    async def get_stream(self, job_id: str) -> Optional[Dict]:
+        return await self.get(job_id, STREAM_FIELDS)
+
+    async def close(self) -> None:
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+            self._collection = None
+
+job_repository = JobRepository()
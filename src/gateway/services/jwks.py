@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+from jose import jwt, JWTError
+
+from ..core.config import settings
+from .auth_client import auth_client
+
+logger = logging.getLogger(__name__)
+
+class LocalTokenVerifier:
+    """
+    Verifies RS256 access tokens in-process against the auth service's JWKS.
+    Keys are cached for JWKS_CACHE_TTL and refetched early when a token names
+    an unknown kid (a rotation), at most once per JWKS_MIN_REFRESH_INTERVAL.
+    Tokens it can't check locally (legacy HS256, keys unavailable) return
+    None so the caller falls back to the auth service.
+    """
+
+    def __init__(self):
+        self.keys: Dict[str, Dict] = {}
+        self.fetched_at: Optional[float] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def verify(self, authorization: str) -> Optional[Dict]:
+        """The user a token belongs to, or None if it must be verified remotely"""
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        if header.get("alg") != "RS256" or not header.get("kid"):
+            return None
+
+        key = await self.key(header["kid"])
+        if key is None:
+            return None
+        try:
+            claims = jwt.decode(token, key, algorithms=["RS256"])
+            if claims.get("type") == "refresh":
+                raise JWTError("Refresh tokens can't authenticate requests")
+            return {"id": int(claims["sub"]), "email": claims.get("email")}
+        except (JWTError, KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=401, detail="Invalid token")
+
+    async def key(self, kid: str) -> Optional[Dict]:
+        now = time.monotonic()
+        stale = self.fetched_at is None or now - self.fetched_at > settings.JWKS_CACHE_TTL
+        if kid in self.keys and not stale:
+            return self.keys[kid]
+
+        async with self.lock:
+            # Another request may have refreshed the keys while we waited
+            if kid not in self.keys or stale:
+                recently = (
+                    self.fetched_at is not None
+                    and time.monotonic() - self.fetched_at < settings.JWKS_MIN_REFRESH_INTERVAL
+                )
+                if not recently:
+                    await self.refresh()
+        return self.keys.get(kid)
+
+    async def refresh(self) -> None:
+        try:
+            jwks = await auth_client.fetch_jwks()
+            self.keys = {key["kid"]: key for key in jwks.get("keys", []) if key.get("kid")}
+            logger.info(f"Loaded {len(self.keys)} token signing keys from the auth service")
+        except HTTPException:
+            # Keep the keys we have; tokens with unknown ones go to the auth service
+            pass
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.error(f"Invalid JWKS from the auth service: {str(e)}")
+        # Throttle retries after failures as well
+        self.fetched_at = time.monotonic()
+
+local_verifier = LocalTokenVerifier()
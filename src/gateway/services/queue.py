@@ -1,7 +1,7 @@
 import aio_pika
 import json
 import logging
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 from ..core.config import settings
@@ -25,10 +25,8 @@ class QueueService:
                 self.channel = await self.connection.channel()
                 
                 # Declare queues
-                await self.channel.declare_queue(
-                    settings.VIDEO_PROCESSING_QUEUE,
-                    durable=True
-                )
+                for queue_name in self.lane_queues():
+                    await self.channel.declare_queue(queue_name, durable=True)
                 await self.channel.declare_queue(
                     settings.NOTIFICATION_QUEUE,
                     durable=True
@@ -39,21 +37,53 @@ class QueueService:
                 logger.error(f"Failed to connect to RabbitMQ: {str(e)}")
                 raise QueueError("Failed to connect to message queue")
 
+    @staticmethod
+    def lane_queues() -> List[str]:
+        queues = [settings.VIDEO_PROCESSING_QUEUE]
+        if settings.JOB_LANES_ENABLED:
+            queues += [f"{settings.VIDEO_PROCESSING_QUEUE}.{lane}" for lane in ("short", "long")]
+        return queues
+
+    @staticmethod
+    def lane_for(duration: Optional[float]) -> Optional[str]:
+        """Size class of a job by input duration; None when it isn't known"""
+        if not settings.JOB_LANES_ENABLED or duration is None:
+            return None
+        return "short" if duration <= settings.SHORT_JOB_MAX_DURATION else "long"
+
     async def publish_conversion_task(
         self,
         job_id: str,
-        file_path: str,
-        user_email: str
+        file_path: Optional[str],
+        user_email: str,
+        content_hash: Optional[str] = None,
+        profiles: Optional[List[str]] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        input_url: Optional[str] = None,
+        input_key: Optional[str] = None,
+        duration: Optional[float] = None,
+        tier: Optional[str] = None
     ) -> None:
-        """Publish video conversion task to queue"""
+        """Publish video conversion task to the queue of its duration lane"""
         try:
             if not self.channel or self.connection.is_closed:
                 await self.connect()
 
+            lane = self.lane_for(duration)
             message = {
                 "job_id": job_id,
                 "file_path": file_path,
                 "user_id": user_email,
+                "tier": tier,
+                "content_hash": content_hash,
+                "profiles": profiles,
+                "start": start,
+                "end": end,
+                "input_url": input_url,
+                "input_key": input_key,
+                "duration": duration,
+                "lane": lane,
                 "timestamp": datetime.utcnow().isoformat()
             }
 
@@ -62,10 +92,13 @@ class QueueService:
                     body=json.dumps(message).encode(),
                     delivery_mode=aio_pika.DeliveryMode.PERSISTENT
                 ),
-                routing_key=settings.VIDEO_PROCESSING_QUEUE
+                routing_key=(
+                    f"{settings.VIDEO_PROCESSING_QUEUE}.{lane}" if lane
+                    else settings.VIDEO_PROCESSING_QUEUE
+                )
             )
 
-            logger.info(f"Published conversion task: {job_id}")
+            logger.info(f"Published conversion task: {job_id} (lane: {lane or 'default'})")
 
         except Exception as e:
             logger.error(f"Error publishing message: {str(e)}")
@@ -0,0 +1,169 @@
+import asyncio
+import secrets
+import logging
+from typing import AsyncIterator, Dict, Optional
+
+from ..core.config import settings
+from .file_handler import file_handler
+from .storage import storage
+
+logger = logging.getLogger(__name__)
+
+class RelayError(Exception):
+    """Raised when the converter stops reading a relayed upload"""
+    pass
+
+# Queued to wake the converter's read when the upload is aborted
+_ABORT = object()
+
+class Relay:
+    """Hands upload chunks for one job from the uploading request to the converter"""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.token = secrets.token_urlsafe(24)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.RELAY_BUFFER_CHUNKS)
+        self.state = "waiting"  # waiting -> relaying | spooling -> spooled
+        self.connected = asyncio.Event()
+        self.spooled = asyncio.Event()
+        self.finished = asyncio.Event()
+        self.spool_key: Optional[str] = None
+        self.error: Optional[str] = None
+
+class RelayService:
+    """
+    In-process relay that lets the converter pull an upload while it is still
+    arriving, so streamable inputs never hit the upload volume. If no
+    converter attaches in time, the upload is spooled to storage and the relay
+    serves it from there instead.
+    """
+
+    def __init__(self):
+        self.relays: Dict[str, Relay] = {}
+
+    def open(self, job_id: str) -> Relay:
+        relay = Relay(job_id)
+        self.relays[job_id] = relay
+        return relay
+
+    def url(self, relay: Relay) -> str:
+        """Address the converter fetches the upload from"""
+        return (
+            f"{settings.GATEWAY_INTERNAL_URL}{settings.API_V1_STR}"
+            f"/relay/{relay.job_id}?token={relay.token}"
+        )
+
+    async def feed(self, relay: Relay, head: bytes, chunks: AsyncIterator[bytes]) -> str:
+        """
+        Push the upload into the relay as it arrives
+        Returns: "relayed" or "spooled"
+        """
+        try:
+            try:
+                await asyncio.wait_for(relay.connected.wait(), settings.RELAY_CONNECT_TIMEOUT)
+            except asyncio.TimeoutError:
+                # No converter picked the job up in time; fall back to storage
+                relay.state = "spooling"
+                logger.info(f"No converter attached to relay {relay.job_id}, spooling upload")
+                relay.spool_key, _ = await file_handler.save_stream(
+                    relay.job_id, f"{relay.job_id}.relay", _prepend(head, chunks)
+                )
+                relay.state = "spooled"
+                relay.spooled.set()
+                self._expire(relay)
+                return "spooled"
+
+            async for chunk in _prepend(head, chunks):
+                if relay.finished.is_set():
+                    raise RelayError("Converter disconnected from relay")
+                try:
+                    # Bounded queue: the upload only advances as fast as FFmpeg reads
+                    await asyncio.wait_for(relay.queue.put(chunk), settings.RELAY_STALL_TIMEOUT)
+                except asyncio.TimeoutError:
+                    raise RelayError("Converter stopped reading from relay")
+            await relay.queue.put(None)
+            return "relayed"
+
+        except BaseException as e:
+            # Includes the uploading client disconnecting: the converter's read
+            # must fail rather than end cleanly on a truncated input
+            self.abort(relay, f"Upload aborted: {e!r}")
+            if not relay.connected.is_set():
+                self.close(relay.job_id)
+            raise
+
+    def abort(self, relay: Relay, reason: str) -> None:
+        """Make the converter's read of this relay fail"""
+        if relay.error is None:
+            relay.error = reason
+        try:
+            relay.queue.put_nowait(_ABORT)
+        except asyncio.QueueFull:
+            pass  # The reader isn't blocked; it checks relay.error before each chunk
+        relay.spooled.set()
+
+    async def attach(self, job_id: str, token: str) -> Optional[AsyncIterator[bytes]]:
+        """Claim a relay for the converter; None if unknown, taken or wrong token"""
+        relay = self.relays.get(job_id)
+        if not relay or relay.connected.is_set() or not secrets.compare_digest(relay.token, token):
+            return None
+        relay.connected.set()
+        if relay.state == "waiting":
+            relay.state = "relaying"
+        return self._drain(relay)
+
+    async def _drain(self, relay: Relay) -> AsyncIterator[bytes]:
+        try:
+            if relay.state == "relaying":
+                while True:
+                    if relay.error:
+                        raise RelayError(relay.error)
+                    try:
+                        chunk = await asyncio.wait_for(
+                            relay.queue.get(), settings.RELAY_STALL_TIMEOUT
+                        )
+                    except asyncio.TimeoutError:
+                        # Failing the response fails the job instead of
+                        # letting FFmpeg encode a truncated input
+                        logger.error(f"Upload for relay {relay.job_id} stalled")
+                        raise RelayError("Upload stalled")
+                    if chunk is _ABORT:
+                        raise RelayError(relay.error or "Upload aborted")
+                    if chunk is None:
+                        return
+                    yield chunk
+
+            await relay.spooled.wait()
+            if relay.error:
+                raise RelayError(relay.error)
+            async for chunk in storage.read(relay.spool_key):
+                yield chunk
+        finally:
+            relay.finished.set()
+            self.close(relay.job_id)
+
+    def _expire(self, relay: Relay) -> None:
+        """Drop a spooled relay nobody fetched, so its upload doesn't linger"""
+        asyncio.get_running_loop().call_later(
+            settings.RELAY_SPOOL_TTL,
+            lambda: None if relay.connected.is_set() else self.close(relay.job_id)
+        )
+
+    def close(self, job_id: str) -> None:
+        relay = self.relays.pop(job_id, None)
+        if relay and relay.spool_key:
+            asyncio.get_running_loop().create_task(self._remove_spool(relay.spool_key))
+
+    async def _remove_spool(self, key: str) -> None:
+        try:
+            await storage.delete(key)
+        except Exception as e:
+            logger.error(f"Error removing relay spool {key}: {str(e)}")
+
+async def _prepend(head: bytes, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    if head:
+        yield head
+    async for chunk in chunks:
+        yield chunk
+
+relay_service = RelayService()
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+import pymongo
+
+from ..core.config import settings
+from .jobs import job_repository, status_view, STATUS_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# MongoDB error code for change streams on a standalone server
+CHANGE_STREAMS_UNSUPPORTED = 40573
+
+class StatusSubscriber:
+    """
+    One client's view of a job. It holds at most one undelivered state:
+    newer states replace it, so a slow client gets the latest status rather
+    than a growing backlog of progress updates.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.pending: Optional[Dict] = None
+        self.last: Optional[Dict] = None
+        self.updated_at: Optional[datetime] = None
+        self.ready = asyncio.Event()
+
+    def offer(self, state: Dict, updated_at: Optional[datetime]) -> None:
+        if updated_at and self.updated_at and updated_at < self.updated_at:
+            return  # An older snapshot arriving after a newer change
+        if _without_timestamp(state) == _without_timestamp(self.pending or self.last or {}):
+            return
+        self.updated_at = updated_at or self.updated_at
+        self.pending = state
+        self.ready.set()
+
+    async def next(self, timeout: float) -> Optional[Dict]:
+        """The next state, or None if nothing changed within timeout"""
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self.ready.clear()
+        state, self.pending = self.pending, None
+        self.last = state
+        return state
+
+class StatusBroadcaster:
+    """
+    Pushes job status changes to subscribers. One watcher per process follows
+    a MongoDB change stream on the jobs collection and fans changes out to
+    everyone subscribed to that job; on a standalone server, which has no
+    change streams, it polls the subscribed jobs in one query instead. The
+    watcher only runs while someone is subscribed. Whenever the stream opens
+    without resuming, every subscriber is re-read, since changes made before
+    it opened are in no stream.
+    """
+
+    def __init__(self):
+        self.subscribers: Dict[str, Set[StatusSubscriber]] = {}
+        self.count = 0
+        self.task: Optional[asyncio.Task] = None
+        self.polling = False
+        self.resume_token = None
+
+    async def subscribe(self, job_id: str) -> Optional[StatusSubscriber]:
+        """Follow a job, starting from its current status; None if it doesn't exist"""
+        subscriber = StatusSubscriber(job_id)
+        # Register before reading the snapshot so no change in between is missed
+        self.subscribers.setdefault(job_id, set()).add(subscriber)
+        self.count += 1
+        self._ensure_watcher()
+
+        try:
+            job = await job_repository.get_status(job_id)
+        except BaseException:
+            self.unsubscribe(subscriber)
+            raise
+        if not job:
+            self.unsubscribe(subscriber)
+            return None
+        subscriber.offer(status_view(job_id, job), job.get("updated_at"))
+        return subscriber
+
+    def unsubscribe(self, subscriber: StatusSubscriber) -> None:
+        subscribers = self.subscribers.get(subscriber.job_id)
+        if not subscribers or subscriber not in subscribers:
+            return
+        subscribers.discard(subscriber)
+        self.count -= 1
+        if not subscribers:
+            del self.subscribers[subscriber.job_id]
+        if not self.subscribers and self.task:
+            # New subscribers start from a snapshot, so nothing needs resuming
+            self.task.cancel()
+            self.task = None
+            self.resume_token = None
+
+    def publish(self, job: Dict) -> None:
+        subscribers = self.subscribers.get(job.get("job_id"))
+        if not subscribers:
+            return
+        state = status_view(job["job_id"], job)
+        for subscriber in subscribers:
+            subscriber.offer(state, job.get("updated_at"))
+
+    def _ensure_watcher(self) -> None:
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    async def run(self) -> None:
+        while self.subscribers:
+            try:
+                if self.polling:
+                    await self.poll()
+                else:
+                    await self.watch()
+            except asyncio.CancelledError:
+                raise
+            except pymongo.errors.OperationFailure as e:
+                if e.code == CHANGE_STREAMS_UNSUPPORTED:
+                    logger.info("MongoDB has no change streams (not a replica set), polling job status")
+                    self.polling = True
+                    continue
+                logger.error(f"Job status change stream failed: {str(e)}")
+                self.resume_token = None
+                await asyncio.sleep(settings.STATUS_POLL_INTERVAL)
+            except Exception as e:
+                logger.error(f"Job status watcher error: {str(e)}")
+                await asyncio.sleep(settings.STATUS_POLL_INTERVAL)
+
+    async def watch(self) -> None:
+        """Fan out inserts and updates from the change stream"""
+        projection = {f"fullDocument.{field}": 1 for field in STATUS_FIELDS if field != "_id"}
+        pipeline = [
+            {"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}},
+            {"$project": {"fullDocument.job_id": 1, **projection}},
+        ]
+        resumed = self.resume_token is not None
+        async with job_repository.collection.watch(
+            pipeline,
+            full_document="updateLookup",
+            resume_after=self.resume_token
+        ) as stream:
+            if not resumed:
+                # Subscribers' snapshots may predate the stream
+                await self.snapshot()
+            async for change in stream:
+                self.resume_token = stream.resume_token
+                if change.get("fullDocument"):
+                    self.publish(change["fullDocument"])
+
+    async def poll(self) -> None:
+        """Fallback: one query for every subscribed job per interval"""
+        await self.snapshot()
+        await asyncio.sleep(settings.STATUS_POLL_INTERVAL)
+
+    async def snapshot(self) -> None:
+        """Publish the current status of every subscribed job in one query"""
+        job_ids = list(self.subscribers)
+        async for job in job_repository.collection.find(
+            {"job_id": {"$in": job_ids}}, {**STATUS_FIELDS, "job_id": 1}
+        ):
+            self.publish(job)
+
+    async def close(self) -> None:
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+def _without_timestamp(state: Dict) -> Dict:
+    return {key: value for key, value in state.items() if key != "timestamp"}
+
+status_broadcaster = StatusBroadcaster()
@@ -0,0 +1,231 @@
+import logging
+import os
+import xml.etree.ElementTree as ET
+from typing import AsyncIterator, Optional
+
+import aiofiles
+import httpx
+
+from ..core.config import settings
+from ..core.exceptions import FileStorageError
+
+logger = logging.getLogger(__name__)
+
+class Storage:
+    """
+    Where uploads and converted outputs live, shared with the converter.
+    Objects are addressed by keys such as "uploads/<file>" and "converted/<file>".
+    """
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path of an object, when the backend has one"""
+        return None
+
+    async def save(self, key: str, chunks: AsyncIterator[bytes]) -> int:
+        """Write a stream of chunks to an object; returns its size"""
+        raise NotImplementedError
+
+    async def read(
+        self,
+        key: str,
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        """Stream an object, or the inclusive byte range start..end of it"""
+        raise NotImplementedError
+        yield b""
+
+    async def size(self, key: str) -> Optional[int]:
+        """Object size in bytes, or None if it doesn't exist"""
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+class LocalStorage(Storage):
+    """Keys map onto the upload and output directories (shared volumes)"""
+
+    def __init__(self):
+        self.roots = {
+            "uploads": settings.UPLOAD_DIR,
+            "converted": settings.OUTPUT_DIR,
+        }
+
+    def local_path(self, key: str) -> str:
+        prefix, _, name = key.partition("/")
+        if prefix not in self.roots or not name or ".." in name.split("/"):
+            raise FileStorageError()
+        return os.path.join(self.roots[prefix], name)
+
+    async def save(self, key: str, chunks: AsyncIterator[bytes]) -> int:
+        path = self.local_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        size = 0
+        async with aiofiles.open(path, "wb") as out_file:
+            async for chunk in chunks:
+                size += len(chunk)
+                await out_file.write(chunk)
+        return size
+
+    async def read(
+        self,
+        key: str,
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        remaining = None if end is None else end - start + 1
+        async with aiofiles.open(self.local_path(key), "rb") as f:
+            await f.seek(start)
+            while remaining is None or remaining > 0:
+                size = settings.STREAM_CHUNK_SIZE
+                if remaining is not None:
+                    size = min(size, remaining)
+                chunk = await f.read(size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    async def size(self, key: str) -> Optional[int]:
+        path = self.local_path(key)
+        return os.path.getsize(path) if os.path.exists(path) else None
+
+    async def delete(self, key: str) -> None:
+        path = self.local_path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+class HTTPStorage(Storage):
+    """
+    S3-style HTTP object store: PUT/GET/HEAD/DELETE on {STORAGE_URL}/{key}.
+    Uploads of unknown length go through multipart upload one part at a time,
+    reads use Range requests.
+    """
+
+    def __init__(self, base_url: str, token: Optional[str] = None):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+            self._client = httpx.AsyncClient(
+                headers=headers,
+                timeout=httpx.Timeout(settings.STORAGE_TIMEOUT, connect=10)
+            )
+        return self._client
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    async def save(self, key: str, chunks: AsyncIterator[bytes]) -> int:
+        url = self.url(key)
+        upload_id = None
+        parts = []
+        buffer = bytearray()
+        size = 0
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                size += len(chunk)
+                if len(buffer) < settings.STORAGE_PART_SIZE:
+                    continue
+                if upload_id is None:
+                    upload_id = await self._start_multipart(url)
+                parts.append(await self._upload_part(url, upload_id, len(parts) + 1, bytes(buffer)))
+                buffer.clear()
+
+            if upload_id is None:
+                # Small enough for a single request
+                response = await self.client.put(url, content=bytes(buffer))
+                response.raise_for_status()
+                return size
+
+            if buffer:
+                parts.append(await self._upload_part(url, upload_id, len(parts) + 1, bytes(buffer)))
+            manifest = "".join(
+                f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>"
+                for number, etag in parts
+            )
+            response = await self.client.post(
+                url,
+                params={"uploadId": upload_id},
+                content=f"<CompleteMultipartUpload>{manifest}</CompleteMultipartUpload>"
+            )
+            response.raise_for_status()
+            return size
+
+        except BaseException:
+            if upload_id is not None:
+                # Don't leave orphaned parts behind in the store
+                try:
+                    await self.client.delete(url, params={"uploadId": upload_id})
+                except httpx.HTTPError:
+                    pass
+            raise
+
+    async def _start_multipart(self, url: str) -> str:
+        response = await self.client.post(url, params={"uploads": ""})
+        response.raise_for_status()
+        upload_id = _xml_text(response.content, "UploadId")
+        if not upload_id:
+            raise FileStorageError()
+        return upload_id
+
+    async def _upload_part(self, url: str, upload_id: str, number: int, body: bytes):
+        response = await self.client.put(
+            url, params={"partNumber": number, "uploadId": upload_id}, content=body
+        )
+        response.raise_for_status()
+        return number, response.headers.get("ETag", "")
+
+    async def read(
+        self,
+        key: str,
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        headers = {}
+        if start or end is not None:
+            headers["Range"] = f"bytes={start}-{'' if end is None else end}"
+        async with self.client.stream("GET", self.url(key), headers=headers) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(settings.STREAM_CHUNK_SIZE):
+                yield chunk
+
+    async def size(self, key: str) -> Optional[int]:
+        response = await self.client.head(self.url(key))
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return int(response.headers.get("Content-Length", 0))
+
+    async def delete(self, key: str) -> None:
+        response = await self.client.delete(self.url(key))
+        if response.status_code not in (200, 204, 404):
+            response.raise_for_status()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+def _xml_text(document: bytes, tag: str) -> Optional[str]:
+    """First text of a tag in an S3-style XML response, ignoring namespaces"""
+    for element in ET.fromstring(document).iter():
+        if element.tag.rsplit("}", 1)[-1] == tag:
+            return element.text
+    return None
+
+def create_storage() -> Storage:
+    if settings.STORAGE_BACKEND == "http":
+        return HTTPStorage(settings.STORAGE_URL, settings.STORAGE_TOKEN or None)
+    return LocalStorage()
+
+storage = create_storage()
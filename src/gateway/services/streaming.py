@@ -0,0 +1,59 @@
+import asyncio
+import os
+import aiofiles
+import logging
+from typing import AsyncIterator, Dict, Optional
+
+from ..core.config import settings
+from .jobs import job_repository
+
+logger = logging.getLogger(__name__)
+
+class StreamService:
+    """Serve a job's primary output while the converter is still writing it"""
+
+    async def wait_for_output(self, job_id: str) -> Optional[Dict]:
+        """
+        Wait until the job has something to stream: a growing file or a
+        finished output. Returns the job, or None if it never became ready.
+        """
+        deadline = asyncio.get_running_loop().time() + settings.STREAM_WAIT_TIMEOUT
+        while True:
+            job = await job_repository.get_stream(job_id)
+            if job:
+                status = job.get("status")
+                if status == "failed":
+                    return job
+                if status == "completed" and (job.get("output_key") or job.get("output_path")):
+                    return job
+                path = job.get("stream_path")
+                if status == "processing" and path and os.path.exists(path):
+                    return job
+
+            if asyncio.get_running_loop().time() >= deadline:
+                return None
+            await asyncio.sleep(settings.STREAM_POLL_INTERVAL)
+
+    async def tail(self, job_id: str, path: str) -> AsyncIterator[bytes]:
+        """Yield the file as it grows until the job leaves 'processing'"""
+        async with aiofiles.open(path, "rb") as stream_file:
+            while True:
+                chunk = await stream_file.read(settings.STREAM_CHUNK_SIZE)
+                if chunk:
+                    yield chunk
+                    continue
+
+                job = await job_repository.get(job_id, {"_id": 0, "status": 1})
+                status = job.get("status") if job else None
+                if status == "completed":
+                    # The encoder is done; drain whatever it wrote last
+                    while chunk := await stream_file.read(settings.STREAM_CHUNK_SIZE):
+                        yield chunk
+                    return
+                if status != "processing":
+                    logger.warning(f"Stopped streaming job {job_id} in status {status}")
+                    return
+
+                await asyncio.sleep(settings.STREAM_POLL_INTERVAL)
+
+stream_service = StreamService()
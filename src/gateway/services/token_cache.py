@@ -0,0 +1,147 @@
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Verifier = Callable[[str], Awaitable[Dict]]
+
+class TokenCache:
+    """
+    LRU cache of verified tokens, keyed by the SHA-256 of the token so raw
+    credentials are never kept. An entry expires at the token's own "exp" or
+    after TOKEN_CACHE_TTL, whichever is first, which bounds how long a revoked
+    user keeps access when no invalidation reaches this process. Concurrent
+    misses for the same token share one verification call.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self.user_keys: Dict[str, Set[str]] = {}
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(authorization: str) -> str:
+        return hashlib.sha256(authorization.encode()).hexdigest()
+
+    async def get(self, authorization: str, verify: Verifier) -> Dict:
+        """The user for a token, verifying it only when it isn't cached"""
+        key = self.key(authorization)
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry[0] > time.time():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self._remove(key)
+
+        self.misses += 1
+        while True:
+            pending = self.inflight.get(key)
+            if pending is None:
+                break
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The request we joined went away mid-call; try again ourselves
+
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            user = await verify(authorization)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Only waiters should see the error; don't warn that nobody retrieved it
+            future.exception()
+            raise
+        else:
+            self._store(key, authorization, user)
+            future.set_result(user)
+            return user
+        finally:
+            del self.inflight[key]
+
+    def _store(self, key: str, authorization: str, user: Dict) -> None:
+        expires_at = time.time() + self.ttl
+        token_exp = _token_exp(authorization)
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        if expires_at <= time.time():
+            return
+
+        self._remove(key)
+        self.entries[key] = (expires_at, user)
+        self.user_keys.setdefault(str(user.get("id")), set()).add(key)
+        while len(self.entries) > self.max_size:
+            self._remove(next(iter(self.entries)))
+
+    def _remove(self, key: str) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        user_id = str(entry[1].get("id"))
+        keys = self.user_keys.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.user_keys[user_id]
+
+    def invalidate_token(self, authorization: str) -> int:
+        """Drop one cached token; returns the count"""
+        key = self.key(authorization)
+        cached = key in self.entries
+        self._remove(key)
+        return int(cached)
+
+    def invalidate_user(self, user_id) -> int:
+        """Drop every cached token of a user, e.g. when they are revoked; returns the count"""
+        keys = list(self.user_keys.get(str(user_id), ()))
+        for key in keys:
+            self._remove(key)
+        if keys:
+            logger.info(f"Invalidated {len(keys)} cached tokens of user {user_id}")
+        return len(keys)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.user_keys.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+def _token_exp(authorization: str) -> Optional[float]:
+    """
+    The unverified "exp" claim of a bearer JWT. Only used to shorten a cache
+    entry for a token the auth service has already accepted.
+    """
+    try:
+        token = authorization.split()[-1]
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL)
@@ -0,0 +1,45 @@
+import asyncio
+
+from src.converter.core.config import settings
+from src.converter.services.concurrency import ConcurrencyController
+from src.converter.utils.limiter import ResizableLimiter
+
+LANES = {"short": 2, "long": 2, "default": 1}
+
+def test_lane_limits_add_up_to_the_total(monkeypatch):
+    monkeypatch.setattr(settings, "LANES", LANES)
+    controller = ConcurrencyController()
+
+    assert controller.lane_limits(5) == LANES
+    assert controller.lane_limits(4) == {"short": 2, "long": 1, "default": 1}
+    assert controller.lane_limits(7) == {"short": 3, "long": 2, "default": 2}
+    for total in range(3, 12):
+        assert sum(controller.lane_limits(total).values()) == total
+
+def test_every_lane_keeps_a_worker_on_small_hosts(monkeypatch):
+    monkeypatch.setattr(settings, "LANES", LANES)
+    monkeypatch.setattr(settings, "ADAPTIVE_MAX_CONCURRENCY", 2)
+    controller = ConcurrencyController()
+
+    assert controller.total == 3
+    assert controller._clamp(1) == 3
+    assert controller.lane_limits(1) == {"short": 1, "long": 1, "default": 1}
+
+def test_static_lanes_are_not_clamped(monkeypatch):
+    monkeypatch.setattr(settings, "LANES", LANES)
+    monkeypatch.setattr(settings, "ADAPTIVE_CONCURRENCY", False)
+    monkeypatch.setattr(settings, "ADAPTIVE_MAX_CONCURRENCY", 2)
+
+    assert ConcurrencyController().lane_limits() == LANES
+
+def test_limiter_at_zero_holds_acquirers_until_resized():
+    async def run():
+        limiter = ResizableLimiter(0)
+        acquire = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not acquire.done() and limiter.waiting == 1
+        limiter.resize(1)
+        await asyncio.wait_for(acquire, 1)
+        assert limiter.active == 1
+
+    asyncio.run(run())
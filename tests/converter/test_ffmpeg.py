@@ -0,0 +1,32 @@
+import asyncio
+
+from src.converter.utils.ffmpeg import ffmpeg
+
+def test_segment_length_limits_every_output(tmp_path, monkeypatch):
+    commands = []
+
+    async def run(command, on_progress=None, stdin_source=None, lane="default"):
+        commands.append(command)
+        return 0, "", []
+
+    monkeypatch.setattr(ffmpeg, "_run", run)
+    plan = {
+        "audio_stream": 0,
+        "segments": [
+            {"start": 0.0, "duration": 300.0, "preroll": 0.0},
+            {"start": 300.0, "duration": 300.0, "preroll": 0.2},
+        ],
+        "outputs": [
+            {"codec_args": ["-c:a", "libmp3lame", "-b:a", "128k"]},
+            {"codec_args": ["-c:a", "libmp3lame", "-b:a", "320k"]},
+        ],
+    }
+    output_paths = [str(tmp_path / "out_128.mp3"), str(tmp_path / "out_320.mp3")]
+
+    asyncio.run(ffmpeg._convert_segments("input.mp4", output_paths, plan))
+
+    second = commands[1]
+    assert second[:8] == ["ffmpeg", "-y", "-ss", "299.800000", "-t", "300.200000", "-i", "input.mp4"]
+    # Only the input is limited; no output carries its own length
+    assert second.count("-t") == 1
+    assert second.count("-map") == 2
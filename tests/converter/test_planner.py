@@ -0,0 +1,37 @@
+from src.converter.services.planner import planner
+
+def mp3_source(stream_bitrate=None, format_bitrate=None, video=False):
+    return {
+        "duration": 60.0,
+        "bit_rate": format_bitrate,
+        "video_codecs": ["h264"] if video else [],
+        "audio_streams": [{
+            "index": 0, "codec": "mp3", "bit_rate": stream_bitrate,
+            "sample_rate": 44100, "channels": 2, "default": True,
+        }],
+    }
+
+def modes(plan):
+    return [output["mode"] for output in plan["outputs"]]
+
+def test_source_within_the_cap_is_copied():
+    _, plan, _ = planner.build_plan(mp3_source(stream_bitrate=128000), ["mp3_128", "mp3_320"])
+    assert modes(plan) == ["copy", "copy"]
+
+def test_unknown_stream_bitrate_falls_back_to_the_format_bitrate():
+    _, plan, _ = planner.build_plan(mp3_source(format_bitrate=320000), ["mp3_128", "mp3_320"])
+    assert modes(plan) == ["encode", "copy"]
+    assert plan["outputs"][0]["bitrate"] == 128000
+
+def test_unknown_bitrate_is_re_encoded_under_a_cap():
+    _, plan, _ = planner.build_plan(mp3_source(format_bitrate=2000000, video=True), ["mp3_128"])
+    assert modes(plan) == ["encode"]
+
+def test_segments_follow_the_lanes_ffmpeg_slots():
+    source = {**mp3_source(stream_bitrate=320000), "duration": 3600.0}
+
+    _, plan, _ = planner.build_plan(source, ["mp3_128"], workers=4)
+    assert len(plan["segments"]) == 4
+
+    _, plan, _ = planner.build_plan(source, ["mp3_128"], workers=1)
+    assert not plan.get("segments")
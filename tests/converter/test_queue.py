@@ -0,0 +1,44 @@
+import asyncio
+
+from src.converter.core.config import settings
+from src.converter.services.queue import QueueConsumer
+
+class FakeExchange:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, message, routing_key):
+        self.published.append((routing_key, message))
+
+class FakeChannel:
+    def __init__(self):
+        self.default_exchange = FakeExchange()
+
+class FakeDelivery:
+    def __init__(self, headers=None):
+        self.body = b'{"user_id": "bulk"}'
+        self.headers = headers
+        self.content_type = "application/json"
+        self.acked = False
+
+    async def ack(self):
+        self.acked = True
+
+def test_repeated_deferrals_back_off_to_the_longest_delay():
+    consumer = QueueConsumer()
+    consumer.channel = FakeChannel()
+    delays = settings.SCHEDULER_DEFER_DELAYS
+    queue = settings.QUEUE_NAME
+
+    async def run():
+        headers = None
+        for _ in range(len(delays) + 2):
+            delivery = FakeDelivery(headers)
+            await consumer.defer(delivery, "default")
+            assert delivery.acked
+            headers = consumer.channel.default_exchange.published[-1][1].headers
+
+    asyncio.run(run())
+    routing_keys = [key for key, _ in consumer.channel.default_exchange.published]
+    expected = delays + [delays[-1]] * 2
+    assert routing_keys == [f"{queue}.deferred.{delay}s" for delay in expected]
@@ -0,0 +1,50 @@
+import json
+
+from src.converter.core.config import settings
+from src.converter.services.scheduler import FairScheduler
+
+class FakeMessage:
+    def __init__(self, body):
+        self.body = body if isinstance(body, bytes) else json.dumps(body).encode()
+
+def job(user_id, duration=60, tier=None):
+    return FakeMessage({"user_id": user_id, "duration": duration, "tier": tier})
+
+def test_bulk_user_is_deferred_once_their_share_is_buffered():
+    scheduler = FairScheduler("default")
+    for _ in range(settings.SCHEDULER_USER_BUFFER):
+        message = job("bulk")
+        assert not scheduler.should_defer(message)
+        scheduler.put(message)
+
+    assert scheduler.should_defer(job("bulk"))
+    assert not scheduler.should_defer(job("other"))
+
+def test_users_are_served_in_turn():
+    scheduler = FairScheduler("default")
+    for _ in range(3):
+        scheduler.put(job("a", duration=settings.SCHEDULER_QUANTUM))
+        scheduler.put(job("b", duration=settings.SCHEDULER_QUANTUM))
+
+    order = [json.loads(scheduler._next().body)["user_id"] for _ in range(6)]
+    assert order == ["a", "b", "a", "b", "a", "b"]
+
+def test_malformed_deliveries_get_default_cost():
+    default = ("", 1.0, settings.SCHEDULER_DEFAULT_COST)
+    assert FairScheduler.classify(FakeMessage(b"\xff")) == default
+    assert FairScheduler.classify(FakeMessage(b"[1, 2]")) == default
+    assert FairScheduler.classify(FakeMessage(b'"job"')) == default
+
+    user_id, weight, cost = FairScheduler.classify(
+        job("a", duration="long", tier=["pro"])
+    )
+    assert (user_id, cost) == ("a", settings.SCHEDULER_DEFAULT_COST)
+    assert weight == settings.TIER_WEIGHTS[settings.DEFAULT_TIER]
+    assert FairScheduler.classify(FakeMessage(b'{"user_id": "a", "duration": NaN}'))[2] == settings.SCHEDULER_DEFAULT_COST
+
+def test_malformed_delivery_can_be_scheduled():
+    scheduler = FairScheduler("default")
+    message = FakeMessage(b'{"user_id": {"id": 1}, "duration": null}')
+    assert not scheduler.should_defer(message)
+    scheduler.put(message)
+    assert scheduler._next() is message
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from src.converter.core.config import settings
+from src.converter.core.exceptions import StorageError
+from src.converter.services.storage import HTTPStorage
+from tests.object_store import ObjectStore
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "SCRATCH_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "STORAGE_PART_SIZE", 4)
+    return ObjectStore()
+
+def http_storage(store):
+    storage = HTTPStorage("http://store/media")
+    storage._client = store.client()
+    return storage
+
+def scratch_file(tmp_path, data):
+    path = tmp_path / "output.mp3"
+    path.write_bytes(data)
+    return str(path)
+
+def test_large_outputs_are_published_in_parts(store, tmp_path):
+    path = scratch_file(tmp_path, b"0123456789")
+
+    size = asyncio.run(http_storage(store).publish(path, "converted/job.mp3"))
+
+    assert size == 10
+    assert store.objects["converted/job.mp3"] == b"0123456789"
+    assert store.requests.count("PUT") == 3
+    assert not store.uploads
+
+def test_failed_multipart_upload_is_aborted(store, tmp_path):
+    path = scratch_file(tmp_path, b"0123456789")
+    store.failing_parts.add(2)
+
+    with pytest.raises(StorageError):
+        asyncio.run(http_storage(store).publish(path, "converted/job.mp3"))
+
+    assert store.aborted and not store.uploads
+    assert "converted/job.mp3" not in store.objects
+
+def test_fetch_copy_and_delete(store):
+    store.objects["uploads/input.mp4"] = b"video"
+
+    async def run():
+        storage = http_storage(store)
+        path, temporary = await storage.fetch("uploads/input.mp4")
+        with open(path, "rb") as f:
+            assert f.read() == b"video" and temporary
+        await storage.copy("uploads/input.mp4", "uploads/copy.mp4")
+        await storage.delete("uploads/input.mp4")
+        return await storage.exists("uploads/input.mp4"), await storage.exists("uploads/copy.mp4")
+
+    assert asyncio.run(run()) == (False, True)
+    assert store.objects["uploads/copy.mp4"] == b"video"
+
+def test_copy_of_missing_object_fails(store):
+    with pytest.raises(StorageError):
+        asyncio.run(http_storage(store).copy("uploads/missing.mp4", "uploads/copy.mp4"))
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from src.gateway.core.config import settings
+from src.gateway.services.relay import RelayError, RelayService
+
+async def read_all(chunks):
+    return [chunk async for chunk in chunks]
+
+async def uploads(*chunks, error=None):
+    for chunk in chunks:
+        yield chunk
+        await asyncio.sleep(0)
+    if error:
+        raise error
+
+def test_complete_upload_is_relayed():
+    async def run():
+        service = RelayService()
+        relay = service.open("job")
+        drain = await service.attach("job", relay.token)
+        reader = asyncio.create_task(read_all(drain))
+        assert await service.feed(relay, b"head", uploads(b"a", b"b")) == "relayed"
+        return await reader
+
+    assert asyncio.run(run()) == [b"head", b"a", b"b"]
+
+def test_uploader_disconnect_fails_the_converter_read():
+    async def run():
+        service = RelayService()
+        relay = service.open("job")
+        drain = await service.attach("job", relay.token)
+        reader = asyncio.create_task(read_all(drain))
+        with pytest.raises(ConnectionResetError):
+            await service.feed(relay, b"head", uploads(b"a", error=ConnectionResetError()))
+        with pytest.raises(RelayError):
+            await reader
+
+    asyncio.run(run())
+
+def test_stalled_upload_fails_the_converter_read(monkeypatch):
+    monkeypatch.setattr(settings, "RELAY_STALL_TIMEOUT", 0.05)
+
+    async def run():
+        service = RelayService()
+        relay = service.open("job")
+        drain = await service.attach("job", relay.token)
+        with pytest.raises(RelayError):
+            await read_all(drain)
+
+    asyncio.run(run())
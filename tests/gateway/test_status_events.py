@@ -0,0 +1,90 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from src.gateway.services.jobs import job_repository
+from src.gateway.services.status_events import StatusBroadcaster
+
+class FakeCursor:
+    def __init__(self, jobs):
+        self.jobs = jobs
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.jobs:
+            raise StopAsyncIteration
+        return self.jobs.pop(0)
+
+class FakeStream:
+    """A change stream that opens after the job has already finished"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.resume_token = None
+
+    async def __aenter__(self):
+        self.collection.job.update(status="completed", progress=100, updated_at=datetime.utcnow())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.Event().wait()
+
+class FakeCollection:
+    def __init__(self, job):
+        self.job = job
+
+    async def find_one(self, query, fields):
+        return dict(self.job)
+
+    def find(self, query, fields):
+        return FakeCursor([dict(self.job)])
+
+    def watch(self, pipeline, **kwargs):
+        return FakeStream(self)
+
+def test_job_finishing_before_the_stream_opens_is_delivered(monkeypatch):
+    job = {
+        "job_id": "job", "status": "processing", "progress": 40,
+        "updated_at": datetime.utcnow() - timedelta(seconds=1)
+    }
+    monkeypatch.setattr(job_repository, "_collection", FakeCollection(job))
+
+    async def run():
+        broadcaster = StatusBroadcaster()
+        subscriber = await broadcaster.subscribe("job")
+        states = []
+        while not states or states[-1]["status"] != "completed":
+            state = await subscriber.next(timeout=1)
+            assert state is not None, f"no completion after {states}"
+            states.append(state)
+        await broadcaster.close()
+        return states
+
+    assert asyncio.run(run())[-1]["progress"] == 100
+
+class UnreachableCollection(FakeCollection):
+    async def find_one(self, query, fields):
+        raise ConnectionError("MongoDB unreachable")
+
+def test_failed_snapshot_unsubscribes(monkeypatch):
+    monkeypatch.setattr(job_repository, "_collection", UnreachableCollection({}))
+
+    async def run():
+        broadcaster = StatusBroadcaster()
+        for _ in range(3):
+            try:
+                await broadcaster.subscribe("job")
+            except ConnectionError:
+                pass
+        return broadcaster
+
+    broadcaster = asyncio.run(run())
+    assert broadcaster.count == 0
+    assert not broadcaster.subscribers and broadcaster.task is None
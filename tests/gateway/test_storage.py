@@ -0,0 +1,64 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.gateway.core.config import settings
+from src.gateway.services.storage import HTTPStorage
+from tests.object_store import ObjectStore
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_PART_SIZE", 4)
+    return ObjectStore()
+
+def http_storage(store):
+    storage = HTTPStorage("http://store/media")
+    storage._client = store.client()
+    return storage
+
+async def chunks(*parts):
+    for part in parts:
+        yield part
+
+async def read_all(storage, key, start=0, end=None):
+    return b"".join([chunk async for chunk in storage.read(key, start, end)])
+
+def test_streamed_upload_is_saved_in_parts(store):
+    storage = http_storage(store)
+
+    size = asyncio.run(storage.save("uploads/input.mp4", chunks(b"012", b"3456", b"789")))
+
+    assert size == 10
+    assert store.objects["uploads/input.mp4"] == b"0123456789"
+    assert not store.uploads
+
+def test_small_upload_is_a_single_put(store):
+    asyncio.run(http_storage(store).save("uploads/input.mp4", chunks(b"012")))
+
+    assert store.objects["uploads/input.mp4"] == b"012"
+    assert "POST" not in store.requests
+
+def test_failed_multipart_upload_is_aborted(store):
+    store.failing_parts.add(2)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(http_storage(store).save("uploads/input.mp4", chunks(b"0123", b"4567", b"89")))
+
+    assert store.aborted and not store.uploads
+    assert "uploads/input.mp4" not in store.objects
+
+def test_ranged_read_size_and_delete(store):
+    store.objects["converted/job.mp3"] = b"0123456789"
+
+    async def run():
+        storage = http_storage(store)
+        assert await read_all(storage, "converted/job.mp3") == b"0123456789"
+        assert await read_all(storage, "converted/job.mp3", 2, 5) == b"2345"
+        assert await read_all(storage, "converted/job.mp3", 7) == b"789"
+        assert await storage.size("converted/job.mp3") == 10
+        await storage.delete("converted/job.mp3")
+        assert await storage.size("converted/job.mp3") is None
+        await storage.delete("converted/job.mp3")  # Already gone is fine
+
+    asyncio.run(run())
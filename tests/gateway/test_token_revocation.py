@@ -0,0 +1,57 @@
+import asyncio
+
+import httpx
+
+from src.gateway.core.config import settings
+from src.gateway.main import app
+from src.gateway.services.token_cache import token_cache
+
+URL = f"{settings.API_V1_STR}/internal/tokens/revoke"
+
+def revoke(json, headers):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+            return await client.post(URL, json=json, headers=headers)
+    return asyncio.run(run())
+
+def cache_tokens(*users):
+    calls = []
+
+    async def verify(authorization):
+        calls.append(authorization)
+        return users[len(calls) - 1]
+
+    async def run():
+        for i in range(len(users)):
+            await token_cache.get(f"Bearer token-{i}", verify)
+    asyncio.run(run())
+    return calls
+
+def test_revoking_a_user_drops_their_cached_tokens(monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", "secret")
+    token_cache.clear()
+    cache_tokens({"id": 1}, {"id": 1}, {"id": 2})
+
+    response = revoke({"user_id": "1"}, {"X-Internal-Token": "secret"})
+
+    assert response.status_code == 200
+    assert response.json() == {"invalidated": 2}
+    assert set(token_cache.user_keys) == {"2"}
+
+    response = revoke({"token": "token-2"}, {"X-Internal-Token": "secret"})
+    assert response.json() == {"invalidated": 1}
+    assert not token_cache.entries
+
+def test_revocation_requires_the_internal_token(monkeypatch):
+    token_cache.clear()
+    cache_tokens({"id": 1})
+
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", "")
+    assert revoke({"user_id": "1"}, {"X-Internal-Token": ""}).status_code == 404
+
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", "secret")
+    assert revoke({"user_id": "1"}, {}).status_code == 403
+    assert revoke({"user_id": "1"}, {"X-Internal-Token": "wrong"}).status_code == 403
+    assert "1" in token_cache.user_keys
+    token_cache.clear()
@@ -0,0 +1,99 @@
+import itertools
+import re
+from typing import Dict, List, Set
+from urllib.parse import parse_qs
+
+import httpx
+
+class ObjectStore:
+    """
+    In-process stand-in for an S3-style object store, served as an ASGI app:
+    objects, multipart uploads, ranged GETs and server-side copies under /media
+    """
+
+    def __init__(self):
+        self.objects: Dict[str, bytes] = {}
+        self.uploads: Dict[str, Dict[int, bytes]] = {}
+        self.aborted: Set[str] = set()
+        self.failing_parts: Set[int] = set()
+        self.requests: List[str] = []
+        self._ids = itertools.count(1)
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=self), base_url="http://store")
+
+    async def __call__(self, scope, receive, send):
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        method = scope["method"]
+        key = scope["path"][len("/media/"):]
+        query = {
+            name: values[0]
+            for name, values in parse_qs(scope["query_string"].decode(), keep_blank_values=True).items()
+        }
+        headers = {name.decode().lower(): value.decode() for name, value in scope["headers"]}
+        self.requests.append(method)
+        status, response_headers, content = self.handle(method, key, query, headers, body)
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(name.encode(), value.encode()) for name, value in response_headers.items()],
+        })
+        await send({"type": "http.response.body", "body": b"" if method == "HEAD" else content})
+
+    def handle(self, method, key, query, headers, body):
+        if method == "POST" and "uploads" in query:
+            upload_id = str(next(self._ids))
+            self.uploads[upload_id] = {}
+            result = f"<InitiateMultipartUploadResult><UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>"
+            return 200, {}, result.encode()
+        if "uploadId" in query:
+            parts = self.uploads.get(query["uploadId"])
+            if parts is None:
+                return 404, {}, b""
+            if method == "PUT":
+                number = int(query["partNumber"])
+                if number in self.failing_parts:
+                    return 500, {}, b""
+                parts[number] = body
+                return 200, {"ETag": f'"part-{number}"'}, b""
+            if method == "POST":
+                numbers = [int(number) for number in re.findall(rb"<PartNumber>(\d+)</PartNumber>", body)]
+                self.objects[key] = b"".join(parts[number] for number in numbers)
+                del self.uploads[query["uploadId"]]
+                return 200, {}, b"<CompleteMultipartUploadResult/>"
+            if method == "DELETE":
+                self.aborted.add(query["uploadId"])
+                del self.uploads[query["uploadId"]]
+                return 204, {}, b""
+
+        if method == "PUT" and "x-amz-copy-source" in headers:
+            source = headers["x-amz-copy-source"][len("/media/"):]
+            if source not in self.objects:
+                return 404, {}, b""
+            self.objects[key] = self.objects[source]
+            return 200, {}, b"<CopyObjectResult/>"
+        if method == "PUT":
+            self.objects[key] = body
+            return 200, {"ETag": '"object"'}, b""
+
+        if key not in self.objects:
+            return 404, {}, b""
+        data = self.objects[key]
+        if method == "DELETE":
+            del self.objects[key]
+            return 204, {}, b""
+        if method == "HEAD":
+            return 200, {"Content-Length": str(len(data))}, b""
+        if method == "GET":
+            match = re.fullmatch(r"bytes=(\d+)-(\d*)", headers.get("range", ""))
+            if not match:
+                return 200, {}, data
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else len(data) - 1
+            return 206, {"Content-Range": f"bytes {start}-{end}/{len(data)}"}, data[start:end + 1]
+        return 405, {}, b""